@@ -0,0 +1,359 @@
+"""
+API de lecture locale sur le warehouse (reports/processed).
+
+    python src/api_service.py                 # sert sur 127.0.0.1:8050
+    python src/api_service.py bench -n 5000   # test de charge local
+
+Routes (GET, JSON) :
+    /health
+    /destinations?w_meteo=60&w_prix=25&w_hotel=15&limit=10
+    /cities/<city>/hotels?limit=10
+    /compare?cities=Avignon,Nimes&w_meteo=60&w_prix=25&w_hotel=15
+"""
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import numpy as np
+import pandas as pd
+
+from scoring import score_weather, score_price, score_review, normalize_weights
+
+
+# =====================================================================
+# CONFIG
+# =====================================================================
+ROOT = Path(__file__).resolve().parents[1]
+PROC = ROOT / "reports" / "processed"
+DEST_PATH = PROC / "destinations_score.csv"
+HOTELS_PATH = PROC / "hotels_clean.csv"
+
+HOST = "127.0.0.1"
+PORT = 8050
+CACHE_SIZE = 512
+RELOAD_INTERVAL = 2.0
+
+DEST_COLUMNS = ["city", "temp_mean", "rain_sum", "price_mean", "score_mean", "lat", "lon"]
+HOTEL_COLUMNS = ["hotelName", "score_num", "price_eur", "url", "lat", "lon", "stars", "review_count"]
+
+STATUS_TEXT = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# =====================================================================
+# 1) TABLES EN MÉMOIRE (chargées une fois, indexées)
+# =====================================================================
+def _file_version(*paths):
+    return tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in paths)
+
+
+class Store:
+    """Snapshot immuable des tables processed : remplacé en bloc au reload."""
+
+    def __init__(self):
+        self.version = _file_version(DEST_PATH, HOTELS_PATH)
+
+        dest = pd.read_csv(DEST_PATH)
+        self.dest = dest[[c for c in DEST_COLUMNS if c in dest.columns]].reset_index(drop=True)
+        self.city_pos = {c.lower(): i for i, c in enumerate(self.dest["city"])}
+
+        # composantes du score (villes × 3) → score = components @ poids
+        self.components = np.column_stack([
+            score_weather(self.dest["temp_mean"], self.dest["rain_sum"]),
+            score_price(self.dest["price_mean"]),
+            score_review(self.dest["score_mean"]),
+        ])
+
+        hotels = pd.read_csv(HOTELS_PATH)
+        hotels = hotels[["city"] + [c for c in HOTEL_COLUMNS if c in hotels.columns]]
+        hotels = hotels.sort_values("score_num", ascending=False, na_position="last")
+        self.hotels_by_city = {
+            city.lower(): g.drop(columns="city").reset_index(drop=True)
+            for city, g in hotels.groupby("city")
+        }
+
+    # -----------------------------------------------------------------
+    def destinations(self, w_meteo, w_prix, w_hotel, limit):
+        weights = np.array(normalize_weights(w_meteo, w_prix, w_hotel))
+        scores = self.components @ weights
+
+        order = np.argsort(-np.nan_to_num(scores, nan=-1), kind="stable")[:limit]
+        df = self.dest.iloc[order].copy()
+        df.insert(0, "rank", np.arange(1, len(df) + 1))
+        df["destination_score"] = scores[order].round(4)
+        return df
+
+    def hotels(self, city, limit):
+        key = city.lower()
+        if key not in self.city_pos:
+            raise ApiError(404, f"ville inconnue : {city}")
+        df = self.hotels_by_city.get(key)
+        if df is None:
+            return pd.DataFrame(columns=HOTEL_COLUMNS)
+        return df.head(limit)
+
+    def compare(self, cities, w_meteo, w_prix, w_hotel):
+        missing = [c for c in cities if c.lower() not in self.city_pos]
+        if missing:
+            raise ApiError(404, f"villes inconnues : {', '.join(missing)}")
+        pos = [self.city_pos[c.lower()] for c in cities]
+        df = self.dest.iloc[pos].copy()
+        weights = np.array(normalize_weights(w_meteo, w_prix, w_hotel))
+        df["destination_score"] = (self.components[pos] @ weights).round(4)
+        return df
+
+
+# =====================================================================
+# 2) CACHE LRU DES RÉPONSES
+# =====================================================================
+class LRUCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+
+# =====================================================================
+# 3) ROUTAGE
+# =====================================================================
+def _int_param(params, name, default, lo=0, hi=10_000):
+    raw = params.get(name, [default])[0]
+    try:
+        return max(lo, min(hi, int(float(raw))))
+    except (ValueError, OverflowError):     # "abc", "nan" / "inf"
+        raise ApiError(400, f"paramètre invalide : {name}={raw}")
+
+
+def _weights(params):
+    """Poids en % comme les sliders du dashboard (défaut 60/25/15)."""
+    return (
+        _int_param(params, "w_meteo", 60),
+        _int_param(params, "w_prix", 25),
+        _int_param(params, "w_hotel", 15),
+    )
+
+
+def _records(df):
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+
+def route(store, path, params):
+    parts = [unquote(p) for p in path.strip("/").split("/") if p]
+
+    if parts == ["health"]:
+        return {"status": "ok", "cities": len(store.dest), "version": list(store.version)}
+
+    if parts == ["destinations"]:
+        limit = _int_param(params, "limit", len(store.dest), lo=1)
+        return _records(store.destinations(*_weights(params), limit))
+
+    if len(parts) == 3 and parts[0] == "cities" and parts[2] == "hotels":
+        return _records(store.hotels(parts[1], _int_param(params, "limit", 10, lo=1)))
+
+    if parts == ["compare"]:
+        cities = [c.strip() for c in params.get("cities", [""])[0].split(",") if c.strip()]
+        if len(cities) < 2:
+            raise ApiError(400, "compare attend au moins 2 villes : ?cities=A,B")
+        return _records(store.compare(cities, *_weights(params)))
+
+    raise ApiError(404, f"route inconnue : {path}")
+
+
+# =====================================================================
+# 4) SERVEUR HTTP ASYNCIO (keep-alive, ETag, reload à chaud)
+# =====================================================================
+class ApiServer:
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.store = Store()
+        self.cache = LRUCache(cache_size)
+
+    def respond(self, target):
+        """Retourne (status, body, etag) — body/etag mis en cache par URL + version."""
+        key = (self.store.version, target)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+
+        url = urlsplit(target)
+        try:
+            payload = route(self.store, url.path, parse_qs(url.query))
+            status = 200
+        except ApiError as e:
+            payload, status = {"error": str(e)}, e.status
+        except Exception as e:
+            # bug de route : réponse 500 plutôt qu'une connexion coupée
+            print(f"[ERR] {target}: {e!r}")
+            payload, status = {"error": "erreur interne"}, 500
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        entry = (status, body, etag)
+        if status == 200:
+            self.cache.put(key, entry)
+        return entry
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, _version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                if method != "GET":
+                    status, body, etag = 405, b'{"error": "GET uniquement"}', None
+                else:
+                    status, body, etag = self.respond(target)
+                    if etag and headers.get("if-none-match") == etag:
+                        status, body = 304, b""
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                head = [
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(body)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                if etag:
+                    head.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch_reload(self, interval=RELOAD_INTERVAL):
+        """Recharge les tables quand un nouveau run ETL réécrit les CSV."""
+        while True:
+            await asyncio.sleep(interval)
+            if _file_version(DEST_PATH, HOTELS_PATH) == self.store.version:
+                continue
+            try:
+                store = await asyncio.to_thread(Store)
+            except Exception as e:
+                # fichier en cours d'écriture : on réessaie au prochain tick
+                print(f"[WARN] reload: {e}")
+                continue
+            self.store = store
+            self.cache.clear()
+            print(f"🔄 Tables rechargées (version {store.version})")
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🚀 API Kayak sur http://{host}:{port} ({len(self.store.dest)} villes)")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch_reload())
+
+
+# =====================================================================
+# 5) TEST DE CHARGE LOCAL
+# =====================================================================
+async def _bench_worker(host, port, targets, n_requests, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            target = targets[i % len(targets)]
+            t0 = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+async def bench(host=HOST, port=PORT, n_requests=5000, concurrency=50):
+    targets = [
+        "/destinations?limit=10",
+        "/destinations?w_meteo=80&w_prix=10&w_hotel=10",
+        "/cities/Avignon/hotels",
+        "/compare?cities=Avignon,Nimes,Uzes",
+    ]
+    per_worker = max(1, n_requests // concurrency)
+    latencies = []
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[
+        _bench_worker(host, port, targets, per_worker, latencies) for _ in range(concurrency)
+    ])
+    dt = time.perf_counter() - t0
+
+    lat = np.array(latencies) * 1000
+    print(f"📊 {len(lat)} requêtes en {dt:.2f}s → {len(lat) / dt:.0f} req/s")
+    print(f"   latence p50={np.percentile(lat, 50):.1f}ms p95={np.percentile(lat, 95):.1f}ms "
+          f"p99={np.percentile(lat, 99):.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API lecture warehouse Kayak")
+    parser.add_argument("mode", nargs="?", choices=["serve", "bench"], default="serve")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.mode == "bench":
+        asyncio.run(bench(args.host, args.port, args.requests, args.concurrency))
+    else:
+        asyncio.run(ApiServer().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+
+# =====================================================================
+# CONFIG CDC
+# =====================================================================
+# clé de jointure + colonnes suivies par table : {change_type: (colonne, tolérance)}
+HOTELS_SPEC = {
+    "keys": ["city", "hotel_key"],
+    "tracked": {
+        "price_changed": ("price_eur", 0.5),
+        "score_changed": ("score_num", 1e-6),
+    },
+    # paramètres de tracking Booking (srpvid, label…) différents à chaque recherche ;
+    # le chemin de l'URL est déjà dans hotel_key
+    "ignored": ["url"],
+}
+DEST_SPEC = {
+    "keys": ["city"],
+    "tracked": {
+        "price_changed": ("price_mean", 0.5),
+        "score_changed": ("destination_score", 1e-4),
+    },
+}
+
+CHANGE_TYPES = ["inserted", "deleted", "price_changed", "score_changed", "changed"]
+
+# colonnes dérivées de l'ensemble des lignes (un changement ailleurs les décale) :
+# jamais stockées, à recalculer à la lecture (ORDER BY destination_score)
+DERIVED_COLUMNS = ["rank"]
+
+
+# =====================================================================
+# 1) DIFF RUN N vs RUN N-1
+# =====================================================================
+def _to_number(s):
+    """Valeurs numériques, NaN sinon (booléens exclus : comparés par égalité)."""
+    num = pd.to_numeric(s, errors="coerce")
+    if pd.api.types.is_bool_dtype(num) or not pd.api.types.is_numeric_dtype(num):
+        return pd.Series(np.nan, index=s.index)
+    return num
+
+
+def _differs(new, old, tol=0.0):
+    """Vrai si la valeur a bougé (de plus que tol pour les numériques ; NaN == NaN)."""
+    both_na = new.isna() & old.isna()
+    new_num = _to_number(new)
+    old_num = _to_number(old)
+    numeric = (new_num.notna() | new.isna()) & (old_num.notna() | old.isna())
+
+    same_num = (new_num - old_num).abs() <= tol
+    same_str = new.astype(str) == old.astype(str)
+    same = np.where(numeric, same_num, same_str) | both_na
+    return pd.Series(~same, index=new.index)
+
+
+def diff_snapshot(df_new, df_prev, spec):
+    """
+    Jointure (hash join pandas) du nouveau run avec le snapshot précédent sur les clés.
+    Retourne le delta : lignes nouvelles / supprimées / modifiées avec une colonne
+    `change_type`. Les colonnes suivies (prix, score) donnent price_changed /
+    score_changed ; toute autre colonne non-clé qui bouge donne `changed`
+    (sauf spec["ignored"] : colonnes volatiles, recopiées mais pas comparées).
+    Les lignes inchangées sont exclues.
+    """
+    keys = spec["keys"]
+    df_new = df_new.drop(columns=[c for c in DERIVED_COLUMNS if c in df_new.columns])
+    df_new = df_new.drop_duplicates(keys, keep="first")
+
+    if df_prev is None:
+        return df_new.assign(change_type="inserted")
+
+    df_prev = df_prev.drop(columns=[c for c in DERIVED_COLUMNS if c in df_prev.columns])
+    df_prev = df_prev.drop_duplicates(keys, keep="first")
+    ignored = set(spec.get("ignored", []))
+    value_cols = [c for c in df_new.columns if c not in keys]
+    compared = [c for c in value_cols if c not in ignored]
+    prev_cols = [c for c in value_cols if c in df_prev.columns]
+    merged = df_new.merge(
+        df_prev[keys + prev_cols],
+        on=keys, how="outer", suffixes=("", "__prev"), indicator=True,
+    )
+
+    change = np.full(len(merged), None, dtype=object)
+    both = (merged["_merge"] == "both").to_numpy()
+
+    # 1) catch-all : n'importe quelle colonne non-clé (nouvelle colonne = changement)
+    tolerances = {col: tol for col, tol in spec["tracked"].values()}
+    for col in compared:
+        if col in prev_cols:
+            moved = _differs(merged[col], merged[f"{col}__prev"], tolerances.get(col, 1e-9))
+        else:
+            moved = merged[col].notna()
+        change[both & moved.to_numpy()] = "changed"
+
+    # 2) colonnes suivies : la première règle de spec["tracked"] l'emporte
+    for change_type, (col, tol) in reversed(list(spec["tracked"].items())):
+        if col not in prev_cols:
+            continue
+        moved = _differs(merged[col], merged[f"{col}__prev"], tol).to_numpy()
+        change[both & moved] = change_type
+    change[(merged["_merge"] == "left_only").to_numpy()] = "inserted"
+
+    deleted = (merged["_merge"] == "right_only").to_numpy()
+    change[deleted] = "deleted"
+    # pour les lignes supprimées, on garde les dernières valeurs connues
+    for col in prev_cols:
+        merged.loc[deleted, col] = merged.loc[deleted, f"{col}__prev"]
+
+    merged["change_type"] = change
+    delta = merged[merged["change_type"].notna()]
+    return delta.drop(columns=["_merge"] + [f"{c}__prev" for c in prev_cols]).reset_index(drop=True)
+
+
+def delta_stats(delta, n_rows):
+    counts = delta["change_type"].value_counts()
+    stats = {t: int(counts.get(t, 0)) for t in CHANGE_TYPES}
+    stats["rows"] = int(n_rows)
+    stats["unchanged"] = int(
+        n_rows - stats["inserted"] - stats["price_changed"] - stats["score_changed"] - stats["changed"]
+    )
+    return stats
+
+
+# =====================================================================
+# 2) SNAPSHOTS
+# =====================================================================
+def load_snapshot(path):
+    return pd.read_csv(path) if path.exists() else None
+
+
+def save_snapshot(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, encoding="utf-8-sig")
@@ -0,0 +1,174 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# =====================================================================
+# DAG D'ÉTAPES ETL
+# =====================================================================
+class Stage:
+    """Une étape : fn(results) où results = {nom_étape: valeur} des étapes amont."""
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+
+
+class DagError(Exception):
+    """Au moins une étape a échoué (les étapes dépendantes ont été sautées)."""
+
+    def __init__(self, report):
+        failed = [n for n, r in report.items() if r["status"] == "failed"]
+        super().__init__(f"étapes en échec : {', '.join(failed)}")
+        self.report = report
+
+
+def topological_order(stages):
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        unknown = [d for d in s.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"{s.name} dépend d'étapes inconnues : {unknown}")
+
+    indegree = {s.name: len(s.deps) for s in stages}
+    children = {s.name: [] for s in stages}
+    for s in stages:
+        for d in s.deps:
+            children[d].append(s.name)
+
+    order = []
+    ready = [s.name for s in stages if indegree[s.name] == 0]
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for child in children[name]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+
+    if len(order) != len(stages):
+        raise ValueError("cycle dans le DAG : " + ", ".join(n for n in indegree if n not in order))
+    return order, children
+
+
+def _descendants(name, children):
+    out, stack = set(), [name]
+    while stack:
+        for child in children[stack.pop()]:
+            if child not in out:
+                out.add(child)
+                stack.append(child)
+    return out
+
+
+# =====================================================================
+# EXÉCUTION
+# =====================================================================
+def run_dag(stages, max_workers=4, fatal=()):
+    """
+    Lance chaque étape dès que ses dépendances sont terminées (threads).
+    - échec d'une étape → ses descendants sont sautés, les branches indépendantes continuent
+    - exception de type `fatal` → plus aucune nouvelle étape n'est lancée
+    Retourne (results, report) ; lève DagError si une étape a échoué.
+    """
+    order, children = topological_order(stages)
+    by_name = {s.name: s for s in stages}
+
+    results = {}
+    report = {name: {"status": "pending", "deps": by_name[name].deps} for name in order}
+    lock = threading.Lock()
+    t_start = time.perf_counter()
+
+    def _run(stage):
+        t0 = time.perf_counter()
+        with lock:
+            inputs = {d: results[d] for d in stage.deps}
+        try:
+            return stage.fn(inputs), t0, time.perf_counter(), None
+        except Exception as e:
+            return None, t0, time.perf_counter(), e
+
+    aborted = False
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            if not aborted:
+                for name in order:
+                    entry = report[name]
+                    if entry["status"] != "pending":
+                        continue
+                    if all(report[d]["status"] == "done" for d in by_name[name].deps):
+                        entry["status"] = "running"
+                        running[pool.submit(_run, by_name[name])] = name
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                value, t0, t1, error = fut.result()
+                entry = report[name]
+                entry.update(start=t0 - t_start, end=t1 - t_start, duration=t1 - t0)
+
+                if error is None:
+                    with lock:
+                        results[name] = value
+                    entry["status"] = "done"
+                    continue
+
+                entry["status"] = "failed"
+                entry["error"] = repr(error)
+                print(f"❌ Étape {name} en échec : {error}")
+                for child in _descendants(name, children):
+                    report[child]["status"] = "skipped"
+                    report[child]["error"] = f"amont en échec : {name}"
+                if isinstance(error, fatal):
+                    aborted = True
+
+    for entry in report.values():
+        if entry["status"] == "pending":
+            entry["status"] = "skipped"
+
+    wall = time.perf_counter() - t_start
+    print_summary(report, order, wall)
+
+    if any(r["status"] == "failed" for r in report.values()):
+        raise DagError(report)
+    return results, report
+
+
+# =====================================================================
+# CHEMIN CRITIQUE
+# =====================================================================
+def critical_path(report, order):
+    """Chaîne de dépendances la plus longue (somme des durées mesurées)."""
+    finish, prev = {}, {}
+    for name in order:
+        entry = report[name]
+        best = max(entry["deps"], key=lambda d: finish[d], default=None)
+        finish[name] = entry.get("duration", 0.0) + (finish[best] if best else 0.0)
+        prev[name] = best
+
+    node = max(finish, key=finish.get)
+    total = finish[node]
+    path = [node]
+    while prev[path[-1]]:
+        path.append(prev[path[-1]])
+    return path[::-1], total
+
+
+def print_summary(report, order, wall):
+    print("⏱️ Étapes :")
+    for name in order:
+        r = report[name]
+        if "duration" in r:
+            print(f"   {name:<20} {r['status']:<8} {r['start']:7.1f}s → {r['end']:7.1f}s ({r['duration']:.1f}s)")
+        else:
+            print(f"   {name:<20} {r['status']}")
+
+    path, total = critical_path(report, order)
+    serial = sum(r.get("duration", 0.0) for r in report.values())
+    print(f"🧵 Chemin critique : {' → '.join(path)} ({total:.1f}s)")
+    print(f"   mur {wall:.1f}s / séquentiel {serial:.1f}s")
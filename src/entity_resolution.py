@@ -0,0 +1,379 @@
+"""
+Résolution d'entités hôtels : un même établissement remonte pour plusieurs
+recherches (St Malo / Mont Saint Michel, Bayonne / Biarritz…) et son nom
+varie légèrement d'un run à l'autre.
+
+1. même chemin Booking (hotel_key)            → même hôtel
+2. blocage : cellule geohash (~1 km) + 8 voisines + 2 tokens de nom les plus rares ;
+   un bloc géo trop dense est parcouru en voisinage trié par nom, pas ignoré
+3. dans chaque bloc, entre villes de recherche différentes seulement (Booking ne
+   liste pas deux fois le même établissement dans une recherche : même ville +
+   hotel_key différent = deux hôtels, même si les noms se ressemblent) :
+   similarité de noms (Jaccard puis SequenceMatcher)
+   - coordonnées connues des deux côtés : distance <= MATCH_RADIUS_M requise
+   - sinon : seuil de nom plus strict
+4. union-find → composantes (jamais deux villes identiques dans une composante)
+5. variations entre runs : une clé nouvelle reprend l'identifiant d'une clé du
+   run précédent disparue, même ville et nom proche (registre persistant)
+
+    python src/entity_resolution.py bench 100000
+"""
+import re
+import sys
+import math
+import time
+import random
+import hashlib
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import combinations
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+
+GEOHASH_PRECISION = 6        # cellule ~1.2 km × 0.6 km
+MAX_BLOCK_SIZE = 30          # bloc token plus gros = clé trop commune, ignoré
+SORTED_WINDOW = 10           # bloc géo trop gros : comparaison aux 10 suivants par nom
+TOKENS_PER_ROW = 2
+MATCH_RADIUS_M = 300
+NAME_SIM_GEO = 0.80          # seuil quand la proximité est confirmée
+NAME_SIM_CITY = 0.92         # seuil sans coordonnées (nom seul)
+
+STOPWORDS = {
+    "hotel", "hotels", "the", "le", "la", "les", "l", "de", "du", "des", "d",
+    "et", "and", "by", "a", "au", "aux", "en", "sur", "spa",
+}
+
+
+# =====================================================================
+# 1) NORMALISATION / CLÉS DE BLOCAGE
+# =====================================================================
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode().lower()
+    tokens = [t for t in re.split(r"[^a-z0-9]+", name) if t and t not in STOPWORDS]
+    return " ".join(tokens)
+
+
+def geo_cell(lat, lon, precision=GEOHASH_PRECISION):
+    """
+    Cellule geohash sous forme (ligne, colonne) entières : même grille que le
+    geohash base32 (5 bits par caractère, alternés lon / lat), mais les cellules
+    voisines s'obtiennent par ±1.
+    """
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    row = min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    col = min(int((lon + 180.0) / 360.0 * (1 << lon_bits)), (1 << lon_bits) - 1)
+    return row, col
+
+
+def neighbor_cells(cell, precision=GEOHASH_PRECISION):
+    """Les 8 cellules voisines (la longitude fait le tour, pas la latitude)."""
+    row, col = cell
+    n_rows, n_cols = 1 << (5 * precision // 2), 1 << ((5 * precision + 1) // 2)
+    return [
+        (row + i, (col + j) % n_cols)
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+        if (i or j) and 0 <= row + i < n_rows
+    ]
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
+
+
+def _has_geo(lat, lon):
+    return lat is not None and lon is not None and not (math.isnan(lat) or math.isnan(lon))
+
+
+# =====================================================================
+# 2) UNION-FIND
+# =====================================================================
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+# =====================================================================
+# 3) RÉSOLUTION (listes Python → labels de composantes)
+# =====================================================================
+def _sorted_neighborhood(block, names, window=SORTED_WINDOW):
+    """Paires d'un bloc trop gros : chaque ligne contre les `window` suivantes par nom."""
+    block = sorted(block, key=lambda i: (names[i], i))
+    for a, i in enumerate(block):
+        for j in block[a + 1:a + 1 + window]:
+            yield i, j
+
+
+def candidate_pairs(names, lats, lons):
+    """
+    Paires (i, j) à comparer (doublons possibles, filtrés par resolve) :
+    - geo_cell : cellule + cellules voisines (un hôtel en bord de cellule a ses
+      voisins à 300 m de l'autre côté) ; trop dense → voisinage trié par nom
+    - tokens rares : bloc complet, ignoré au-delà de MAX_BLOCK_SIZE
+    """
+    tokens = [n.split() for n in names]
+    df = Counter(t for toks in tokens for t in set(toks))
+
+    cells, blocks = defaultdict(list), defaultdict(list)
+    for i, toks in enumerate(tokens):
+        if _has_geo(lats[i], lons[i]):
+            cells[geo_cell(lats[i], lons[i])].append(i)
+        for t in sorted(set(toks), key=lambda t: (df[t], t))[:TOKENS_PER_ROW]:
+            blocks[t].append(i)
+
+    for cell, members in cells.items():
+        # chaque paire de cellules adjacentes n'est visitée qu'une fois
+        block = members + [i for nb in neighbor_cells(cell) if nb > cell for i in cells.get(nb, ())]
+        if len(block) <= MAX_BLOCK_SIZE:
+            yield from combinations(block, 2)
+        else:
+            yield from _sorted_neighborhood(block, names)
+
+    for block in blocks.values():
+        if 1 < len(block) <= MAX_BLOCK_SIZE:
+            yield from combinations(block, 2)
+
+
+def similar_names(a, b, tokens_a, tokens_b, threshold):
+    if tokens_a and tokens_b and len(tokens_a & tokens_b) / len(tokens_a | tokens_b) >= threshold:
+        return True
+    sm = SequenceMatcher(None, a, b, autojunk=False)
+    return sm.real_quick_ratio() >= threshold and sm.quick_ratio() >= threshold and sm.ratio() >= threshold
+
+
+def _same_place(lat1, lon1, lat2, lon2):
+    """Seuil de nom à appliquer, ou None si les coordonnées excluent la paire."""
+    if _has_geo(lat1, lon1) and _has_geo(lat2, lon2):
+        return NAME_SIM_GEO if haversine_m(lat1, lon1, lat2, lon2) <= MATCH_RADIUS_M else None
+    return NAME_SIM_CITY
+
+
+def is_match(i, j, names, token_sets, lats, lons, cities):
+    # même recherche, clés différentes : deux établissements distincts
+    if cities[i] == cities[j]:
+        return False
+    threshold = _same_place(lats[i], lons[i], lats[j], lons[j])
+    return threshold is not None and similar_names(
+        names[i], names[j], token_sets[i], token_sets[j], threshold
+    )
+
+
+def resolve(keys, names, lats, lons, cities):
+    """Retourne (labels, n_pairs) : labels[i] = plus petit index de la composante."""
+    n = len(names)
+    uf = UnionFind(n)
+
+    first_by_key = {}
+    for i, k in enumerate(keys):
+        if k in first_by_key:
+            uf.union(first_by_key[k], i)
+        else:
+            first_by_key[k] = i
+
+    names = [normalize_name(x) for x in names]
+    token_sets = [set(x.split()) for x in names]
+
+    # villes de chaque composante : A(ville 1) ~ B(ville 2) ~ C(ville 1) ne doit
+    # pas fusionner A et C par transitivité
+    comp_cities = defaultdict(set)
+    for i, c in enumerate(cities):
+        comp_cities[uf.find(i)].add(c)
+
+    seen = set()
+    for i, j in candidate_pairs(names, lats, lons):
+        if i > j:
+            i, j = j, i
+        if i == j or (i, j) in seen:
+            continue
+        seen.add((i, j))
+        ri, rj = uf.find(i), uf.find(j)
+        if ri == rj or comp_cities[ri] & comp_cities[rj]:
+            continue
+        if is_match(i, j, names, token_sets, lats, lons, cities):
+            uf.union(ri, rj)
+            comp_cities[min(ri, rj)] |= comp_cities.pop(max(ri, rj))
+
+    return [uf.find(i) for i in range(n)], len(seen)
+
+
+# =====================================================================
+# 4) DATAFRAME : canonical_id + ville de rattachement
+# =====================================================================
+REGISTRY_COLUMNS = ["hotel_key", "canonical_id", "city", "hotelName", "lat", "lon"]
+
+
+def _new_canonical_id(key, taken=()):
+    """Identifiant dérivé de la clé ; re-salé s'il est déjà attribué (scission d'entité)."""
+    salt, cid = 0, "H" + hashlib.blake2b(str(key).encode(), digest_size=5).hexdigest()
+    while cid in taken:
+        salt += 1
+        cid = "H" + hashlib.blake2b(f"{key}#{salt}".encode(), digest_size=5).hexdigest()
+    return cid
+
+
+def match_previous_run(df, registry):
+    """
+    Clés nouvelles (absentes du registre) → canonical_id d'une clé disparue du
+    run (même ville, nom proche, coordonnées compatibles). Un identifiant déjà
+    porté dans la ville ce run n'est jamais repris.
+    """
+    current = set(df["hotel_key"])
+    gone = registry[~registry["hotel_key"].isin(current)]
+    new = df[~df["hotel_key"].isin(registry["hotel_key"])].drop_duplicates("hotel_key")
+    if gone.empty or new.empty:
+        return {}
+
+    known = dict(zip(registry["hotel_key"], registry["canonical_id"]))
+    used = {(c, known[k]) for k, c in zip(df["hotel_key"], df["city"]) if k in known}
+    gone_by_city = {
+        city: [(cid, normalize_name(n), lat, lon) for cid, n, lat, lon in
+               zip(g["canonical_id"], g["hotelName"].fillna(""), g["lat"], g["lon"])]
+        for city, g in gone.groupby("city")
+    }
+
+    lats = new["lat"] if "lat" in new.columns else [None] * len(new)
+    lons = new["lon"] if "lon" in new.columns else [None] * len(new)
+    inherited = {}
+    for key, city, name, lat, lon in zip(new["hotel_key"], new["city"], new["hotelName"].fillna(""), lats, lons):
+        a = normalize_name(name)
+        for cid, b, g_lat, g_lon in gone_by_city.get(city, ()):
+            if (city, cid) in used:
+                continue
+            threshold = _same_place(lat, lon, g_lat, g_lon)
+            if threshold is not None and similar_names(a, b, set(a.split()), set(b.split()), threshold):
+                inherited[key] = cid
+                used.add((city, cid))
+                break
+    return inherited
+
+
+def assign_canonical_ids(df_hotels, registry=None):
+    """
+    Ajoute canonical_id à df_hotels. registry (hotel_key → canonical_id, ville,
+    nom, coordonnées) rend l'identifiant stable entre runs ; il est retourné mis à jour.
+    Si une ancienne entité est scindée, son identifiant va à la composante qui
+    en porte le plus de clés ; les autres morceaux reçoivent un nouvel identifiant.
+    """
+    df = df_hotels.reset_index(drop=True).copy()
+    lats = df["lat"].astype(float).tolist() if "lat" in df.columns else [None] * len(df)
+    lons = df["lon"].astype(float).tolist() if "lon" in df.columns else [None] * len(df)
+
+    labels, n_pairs = resolve(
+        df["hotel_key"].tolist(), df["hotelName"].fillna("").tolist(),
+        lats, lons, df["city"].tolist(),
+    )
+    df["_component"] = labels
+
+    registry = (registry if registry is not None else pd.DataFrame()).reindex(columns=REGISTRY_COLUMNS)
+    known = dict(zip(registry["hotel_key"], registry["canonical_id"]))
+    inherited = match_previous_run(df, registry)
+    known.update(inherited)
+
+    components = df.groupby("_component")["hotel_key"].agg(lambda keys: sorted(set(keys)))
+    votes = Counter(
+        (known[k], comp) for comp, keys in components.items() for k in keys if k in known
+    )
+    ids, taken = {}, set()
+    for (cid, comp), _ in sorted(votes.items(), key=lambda kv: (-kv[1], kv[0])):
+        if comp not in ids and cid not in taken:
+            ids[comp] = cid
+            taken.add(cid)
+    taken |= set(known.values())
+    for comp, keys in components.items():
+        if comp not in ids:
+            ids[comp] = _new_canonical_id(keys[0], taken)
+            taken.add(ids[comp])
+    df["canonical_id"] = df["_component"].map(ids)
+    df = df.drop(columns="_component")
+
+    current = df.drop_duplicates("hotel_key").reindex(columns=REGISTRY_COLUMNS)
+    registry = pd.concat(
+        [registry[~registry["hotel_key"].isin(current["hotel_key"])], current], ignore_index=True
+    )
+
+    n_dup = len(df) - df["canonical_id"].nunique()
+    print(f"🧬 {df['canonical_id'].nunique()} hôtels uniques / {len(df)} lignes "
+          f"({n_dup} doublons, {len(inherited)} clés reprises du run précédent, "
+          f"{n_pairs} paires comparées)")
+    return df, registry
+
+
+def assign_home_city(df_hotels, df_geo):
+    """
+    is_primary = True pour une seule ligne par canonical_id : la ville de recherche
+    la plus proche de l'hôtel si géolocalisé, sinon la première rencontrée.
+    """
+    df = df_hotels.copy()
+    centers = df_geo.set_index("city")[["lat", "lon"]].rename(columns={"lat": "c_lat", "lon": "c_lon"})
+    df = df.join(centers, on="city")
+
+    if "lat" in df.columns:
+        dist = [
+            haversine_m(a, b, c, d) if _has_geo(a, b) and _has_geo(c, d) else math.inf
+            for a, b, c, d in zip(df["lat"], df["lon"], df["c_lat"], df["c_lon"])
+        ]
+    else:
+        dist = [math.inf] * len(df)
+    df["_dist"] = dist
+    df["_order"] = range(len(df))
+
+    primary = df.sort_values(["_dist", "_order"]).drop_duplicates("canonical_id").index
+    df["is_primary"] = df.index.isin(primary)
+    return df.drop(columns=["c_lat", "c_lon", "_dist", "_order"])
+
+
+# =====================================================================
+# 5) BENCH SYNTHÉTIQUE
+# =====================================================================
+def _bench(n_rows):
+    rng = random.Random(0)
+    words = ["mer", "port", "gare", "centre", "vieux", "plage", "chateau", "remparts", "abbaye",
+             "jardin", "pins", "baie", "roc", "marina", "ocean", "soleil", "colline", "source"]
+    chains = ["Ibis", "Mercure", "Novotel", "Kyriad", "B&B", "Best Western", "Campanile", ""]
+
+    keys, names, lats, lons, cities = [], [], [], [], []
+    n_base = n_rows // 2
+    for h in range(n_rows):
+        base = rng.randrange(n_base)
+        r = random.Random(base)
+        name = f"{r.choice(chains)} {r.choice(words).title()} {r.choice(words).title()} {base}"
+        if rng.random() < 0.3:   # variation de nom
+            pos = rng.randrange(len(name))
+            name = name[:pos] + name[pos + 1:]
+        lat = 42 + r.random() * 7 + rng.gauss(0, 0.0003)
+        lon = -2 + r.random() * 9 + rng.gauss(0, 0.0003)
+        keys.append(f"/hotel/fr/h{h}")
+        names.append(name)
+        lats.append(lat)
+        lons.append(lon)
+        cities.append(f"city{h % 500}")      # doublons = recherches de villes différentes
+
+    t0 = time.perf_counter()
+    labels, n_pairs = resolve(keys, names, lats, lons, cities)
+    dt = time.perf_counter() - t0
+    print(f"📊 {n_rows} lignes → {len(set(labels))} entités, {n_pairs} paires, {dt:.2f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
+    else:
+        print(__doc__)
@@ -1,14 +1,23 @@
 from __future__ import annotations
 from pathlib import Path
 import time
+import json
 import pandas as pd
 
-from scrapers.booking_scraper import scrape_booking
+from scrapers.scheduler import RetryScheduler
+from scrapers.booking_details import enrich_hotels
+from entity_resolution import assign_canonical_ids, assign_home_city
+from lake import write_partition, compact_lake
+from warehouse import load_warehouse
+from spatial import cluster_destinations
+from sensitivity import cached_analysis
+from dag import Stage, DagError, run_dag, critical_path
+from cdc import HOTELS_SPEC, DEST_SPEC, DERIVED_COLUMNS, diff_snapshot, delta_stats, load_snapshot, save_snapshot
 from utils import (
     ROOT, RAW, PROC, FIG,
     HardFailure, geocode_cities, fetch_weather,
     compute_destination_score, make_maps,
-    upload_file_to_s3, load_to_rds
+    upload_file_to_s3, apply_deltas_to_rds
 )
 
 # -------------------------------------------------------------
@@ -24,7 +33,32 @@ CITIES = [
 ]
 
 MAX_HOTELS_PER_CITY = 20
+SCRAPE_ATTEMPTS = 3
+
+# seuil d'acceptation par ville (défaut 10) : les lieux ruraux / monuments
+# renvoient peu d'hôtels même quand tout va bien
+MIN_HOTELS_DEFAULT = 10
+MIN_HOTELS_PER_CITY = {
+    "Ariege": 3,
+    "Gorges du Verdon": 5,
+    "Chateau du Haut Koenigsbourg": 5,
+    "Eguisheim": 5,
+    "Mont Saint Michel": 5,
+    "Saintes Maries de la mer": 5,
+}
 WEATHER_DAYS = 7
+WEATHER_TTL_HOURS = 12
+WEATHER_CLUSTER_KM = 10   # destinations voisines (Colmar / Eguisheim…) : un seul appel météo
+DETAIL_TTL_DAYS = 30
+DETAIL_WORKERS = 6
+
+PIPELINE_WORKERS = 4
+
+CDC_DIR = PROC / "cdc"
+# chaque destination des deltas a son propre snapshot : l'une peut être en panne
+# (RDS injoignable) sans bloquer ni fausser les deltas de l'autre
+CDC_SINKS = ["rds", "s3"]
+RUN_REPORT = PROC / "run_report.json"
 
 
 # ============================================================
@@ -36,11 +70,14 @@ def step_geocoding() -> pd.DataFrame:
 
     if geo_path.exists():
         df_geo = pd.read_csv(geo_path)
+        # snapshot du run dans le lake, même servi depuis le cache
+        write_partition(df_geo, "geocoding")
         print(f"✅ {len(df_geo)} villes géocodées (cache)")
         return df_geo
 
     df_geo = geocode_cities(CITIES)
     df_geo.to_csv(geo_path, index=False, encoding="utf-8-sig")
+    write_partition(df_geo, "geocoding")
     print(f"✅ {len(df_geo)} villes géocodées (Nominatim)")
     return df_geo
 
@@ -52,13 +89,28 @@ def step_weather(df_geo: pd.DataFrame) -> pd.DataFrame:
     print("⛅ Météo...")
     weather_path = RAW / "weather_raw.csv"
 
-    if weather_path.exists():
+    # les prévisions changent chaque jour : cache valable WEATHER_TTL_HOURS
+    if weather_path.exists() and time.time() - weather_path.stat().st_mtime < WEATHER_TTL_HOURS * 3600:
         df_weather = pd.read_csv(weather_path)
         print(f"✅ {len(df_weather)} lignes météo (cache)")
         return df_weather
 
-    df_weather = fetch_weather(df_geo, WEATHER_DAYS)
+    # un appel par cluster de destinations proches, recopié sur chaque membre
+    df_clusters = cluster_destinations(df_geo, WEATHER_CLUSTER_KM)
+    df_reps = df_clusters[df_clusters["is_representative"]]
+    df_weather_reps = fetch_weather(df_reps, WEATHER_DAYS)
+
+    members = df_clusters.loc[df_clusters["cluster_id"] >= 0, ["city", "cluster_id"]].merge(
+        df_reps[["city", "cluster_id"]].rename(columns={"city": "rep_city"}), on="cluster_id"
+    )
+    df_weather = (
+        members.merge(df_weather_reps.rename(columns={"city": "rep_city"}), on="rep_city")
+        .drop(columns=["cluster_id", "rep_city"])
+    )
+    print(f"☁️ {len(df_reps)} appels météo pour {len(members)} villes (clusters {WEATHER_CLUSTER_KM} km)")
+
     df_weather.to_csv(weather_path, index=False, encoding="utf-8-sig")
+    write_partition(df_weather, "weather")
     print(f"✅ {len(df_weather)} lignes météo (API)")
     return df_weather
 
@@ -72,10 +124,18 @@ def step_scraping() -> pd.DataFrame:
     hotels_all = []
     t0 = time.time()
 
-    for city in CITIES:
-        rows = scrape_booking(city, max_hotels=MAX_HOTELS_PER_CITY, retries=3)
-        if rows:
-            hotels_all.extend(rows)
+    scheduler = RetryScheduler(max_attempts=SCRAPE_ATTEMPTS)
+    results = scheduler.run(
+        CITIES,
+        max_hotels=MAX_HOTELS_PER_CITY,
+        min_hotels=MIN_HOTELS_PER_CITY,
+        default_min=MIN_HOTELS_DEFAULT,
+    )
+    for rows in results.values():
+        hotels_all.extend(rows)
+
+    if scheduler.breaker_trips:
+        print(f"🔌 Driver redémarré {scheduler.breaker_trips} fois")
 
     df_hotels = pd.DataFrame(hotels_all)
 
@@ -93,6 +153,7 @@ def step_scraping() -> pd.DataFrame:
 
     hotels_raw = RAW / "hotels_raw.csv"
     df_hotels.to_csv(hotels_raw, index=False, encoding="utf-8-sig")
+    write_partition(df_hotels, "hotels")
 
     dt = time.time() - t0
     print(f"✅ {len(df_hotels)} hôtels scrapés en {dt/60:.1f} minutes")
@@ -100,6 +161,42 @@ def step_scraping() -> pd.DataFrame:
     return df_hotels
 
 
+# ============================================================
+# 3b) DÉTAILS HÔTELS (géoloc, adresse, étoiles, avis)
+# ============================================================
+def step_hotel_details(df_hotels: pd.DataFrame) -> pd.DataFrame:
+    print("📌 Enrichissement hôtels...")
+    t0 = time.time()
+
+    df_hotels = enrich_hotels(
+        df_hotels,
+        cache_path=RAW / "hotel_details.csv",
+        ttl_days=DETAIL_TTL_DAYS,
+        max_workers=DETAIL_WORKERS,
+    )
+
+    n_geo = df_hotels["lat"].notna().sum()
+    print(f"✅ {n_geo}/{len(df_hotels)} hôtels géolocalisés en {time.time() - t0:.0f}s")
+    return df_hotels
+
+
+# ============================================================
+# 3c) DÉDOUBLONNAGE HÔTELS (entity resolution)
+# ============================================================
+def step_entity_resolution(df_hotels: pd.DataFrame, df_geo: pd.DataFrame) -> pd.DataFrame:
+    print("🧬 Dédoublonnage hôtels...")
+    registry_path = PROC / "hotel_entities.csv"
+    registry = pd.read_csv(registry_path) if registry_path.exists() else None
+
+    df_hotels, registry = assign_canonical_ids(df_hotels, registry)
+    registry.to_csv(registry_path, index=False, encoding="utf-8-sig")
+
+    # un hôtel remonté par plusieurs recherches n'est compté que dans une ville
+    df_hotels = assign_home_city(df_hotels, df_geo)
+    print(f"✅ {(~df_hotels['is_primary']).sum()} lignes secondaires exclues des agrégats")
+    return df_hotels
+
+
 # ============================================================
 # 4) AGGREGATION DESTINATIONS
 # ============================================================
@@ -112,8 +209,8 @@ def step_aggregation(df_geo: pd.DataFrame, df_weather: pd.DataFrame, df_hotels:
         rain_sum=("rain", "sum"),
     )
 
-    # hôtels agrégés
-    df_h = df_hotels.groupby("city", as_index=False).agg(
+    # hôtels agrégés (une seule ligne par hôtel canonique)
+    df_h = df_hotels[df_hotels["is_primary"]].groupby("city", as_index=False).agg(
         price_mean=("price_eur", "mean"),
         score_mean=("score_num", "mean"),
     )
@@ -150,6 +247,79 @@ def step_aggregation(df_geo: pd.DataFrame, df_weather: pd.DataFrame, df_hotels:
     return df_dest, dest_path, hotels_clean
 
 
+# ============================================================
+# 4b) CDC : DELTA vs RUN PRÉCÉDENT
+# ============================================================
+def step_cdc(df_dest: pd.DataFrame, df_hotels: pd.DataFrame) -> dict:
+    """Retourne {sink: {table: entry}} : un delta par destination, vs son propre snapshot."""
+    print("🧮 Delta vs run précédent...")
+    cdc = {sink: {} for sink in CDC_SINKS}
+
+    for table, df_new, spec in [
+        ("destinations", df_dest, DEST_SPEC),
+        ("hotels", df_hotels, HOTELS_SPEC),
+    ]:
+        # rank n'est pas stocké : il dépend de toutes les lignes (cf. cdc.DERIVED_COLUMNS)
+        df_new = df_new.drop(columns=[c for c in DERIVED_COLUMNS if c in df_new.columns])
+
+        for sink in CDC_SINKS:
+            snapshot_path = CDC_DIR / sink / f"{table}_snapshot.csv"
+            df_prev = load_snapshot(snapshot_path)
+            if df_prev is None:
+                # ancien snapshot partagé (avant un snapshot par destination)
+                df_prev = load_snapshot(CDC_DIR / f"{table}_snapshot.csv")
+
+            delta = diff_snapshot(df_new, df_prev, spec)
+            delta_path = PROC / f"{table}_delta_{sink}.csv"
+            delta.to_csv(delta_path, index=False, encoding="utf-8-sig")
+
+            stats = delta_stats(delta, len(df_new))
+            print(f"   {sink:<4} {table:<12} +{stats['inserted']} -{stats['deleted']} "
+                  f"~prix {stats['price_changed']} ~score {stats['score_changed']} ~autre {stats['changed']} "
+                  f"(= {stats['unchanged']})")
+
+            cdc[sink][table] = {
+                "df": df_new,
+                "delta": delta,
+                "delta_path": delta_path,
+                "keys": spec["keys"],
+                "full": df_prev is None,
+                "snapshot_path": snapshot_path,
+                "stats": stats,
+            }
+
+    print("✅ Deltas générés")
+    return cdc
+
+
+def commit_cdc_snapshots(entries: dict):
+    """Le snapshot d'une destination n'avance qu'une fois ses deltas appliqués."""
+    for entry in entries.values():
+        save_snapshot(entry["df"], entry["snapshot_path"])
+
+
+# ============================================================
+# 4c) WAREHOUSE DUCKDB (star schema + mart)
+# ============================================================
+def step_warehouse(df_geo: pd.DataFrame, df_weather: pd.DataFrame, df_hotels: pd.DataFrame) -> int:
+    print("🏛️ Warehouse DuckDB...")
+    n = load_warehouse(df_geo, df_weather, df_hotels, cities=CITIES)
+    print(f"✅ mart_city_summary : {n} villes rafraîchies")
+    return n
+
+
+# ============================================================
+# 4d) SENSIBILITÉ DU CLASSEMENT AUX POIDS
+# ============================================================
+def step_sensitivity(df_dest: pd.DataFrame) -> pd.DataFrame:
+    print("🎲 Sensibilité du classement...")
+    # précalcul mis en cache pour le dashboard (tous poids possibles)
+    summary, _ = cached_analysis(df_dest)
+    stable = summary.loc[summary["tier"] == "Top stable", "city"].tolist()
+    print(f"✅ Top stable : {', '.join(stable) if stable else 'aucune ville'}")
+    return summary
+
+
 # ============================================================
 # 5) CARTES
 # ============================================================
@@ -162,66 +332,148 @@ def step_maps(df_geo: pd.DataFrame, df_dest: pd.DataFrame, df_hotels: pd.DataFra
 # ============================================================
 # 6) S3
 # ============================================================
-def step_s3(df_paths: dict):
+def step_s3(df_paths: dict) -> bool:
+    """True si tous les fichiers sont arrivés sur S3."""
     print("☁️ Upload S3...")
     try:
-        for local_path, key in df_paths.items():
-            upload_file_to_s3(local_path, key)
-        print("☁️ Upload OK")
+        ok = all([upload_file_to_s3(local_path, key) for local_path, key in df_paths.items()])
+        print("☁️ Upload OK" if ok else "⚠️ Upload S3 incomplet")
+        return ok
     except Exception as e:
         print(f"[ERR] S3: {e}")
+        return False
 
 
 # ============================================================
 # 7) RDS
 # ============================================================
-def step_rds(df_dest: pd.DataFrame, df_hotels: pd.DataFrame):
+def step_rds(cdc: dict) -> bool:
     print("🗄️ RDS...")
     try:
-        load_to_rds(df_dest=df_dest, df_hotels=df_hotels)
+        return apply_deltas_to_rds([
+            (table, e["delta"], e["keys"], e["df"], e["full"]) for table, e in cdc.items()
+        ])
     except Exception as e:
         # Ici on ne remet PAS en cause ton URI, on log juste l’erreur runtime
         print(f"[ERR] RDS (to_sql / connexion runtime): {e}")
+        return False
 
 
 # ============================================================
-# PIPELINE COMPLET
+# RAPPORT DE RUN
 # ============================================================
-def main():
-    print("🚀 Pipeline Kayak complet")
+def write_run_report(report: dict):
+    with open(RUN_REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"📝 Rapport de run → {RUN_REPORT.name}")
 
-    # 1) GÉOCODAGE
-    df_geo = step_geocoding()
 
-    # 2) MÉTÉO
-    df_weather = step_weather(df_geo)
-
-    # 3) SCRAPING BOOKING
-    df_hotels = step_scraping()
-
-    # 4) AGGREGATION
-    df_dest, dest_path, hotels_clean = step_aggregation(df_geo, df_weather, df_hotels)
-
-    # 5) CARTES
-    step_maps(df_geo, df_dest, df_hotels)
-
-    # 6) S3 (optionnel selon tes ENV)
-    geo_path = RAW / "geocoding.csv"
-    weather_path = RAW / "weather_raw.csv"
-    hotels_raw = RAW / "hotels_raw.csv"
+# ============================================================
+# PIPELINE COMPLET
+# ============================================================
+def build_pipeline(run_id: str) -> list:
+    """
+    DAG des étapes : chaque Stage reçoit les résultats de ses dépendances.
+
+    geocoding ── weather
+    scraping ── hotel_details ── entity_resolution (+ geocoding)
+    aggregation (geocoding, weather, entity_resolution) ── cdc ── rds / s3 (indépendants)
+    maps, sensitivity (aggregation), warehouse (geocoding, weather, entity_resolution)
+    lake_compaction : après geocoding + weather + scraping
+    """
+    def s3_stage(r):
+        step_s3({
+            RAW / "geocoding.csv": "bloc1_kayak/geocoding.csv",
+            RAW / "weather_raw.csv": "bloc1_kayak/weather_raw.csv",
+            RAW / "hotels_raw.csv": "bloc1_kayak/hotels_raw.csv",
+            RAW / "hotel_details.csv": "bloc1_kayak/hotel_details.csv",
+        })
+        # processed : uniquement les deltas du run (vs le snapshot S3) ; le
+        # snapshot S3 n'avance que si tous les deltas sont publiés
+        entries = r["cdc"]["s3"]
+        s3_ok = step_s3({
+            entry["delta_path"]: f"bloc1_kayak/deltas/{run_id}/{table}_delta.csv"
+            for table, entry in entries.items()
+        })
+        if s3_ok:
+            commit_cdc_snapshots(entries)
+        return s3_ok
+
+    def rds_stage(r):
+        entries = r["cdc"]["rds"]
+        rds_ok = step_rds(entries)
+        if rds_ok:
+            commit_cdc_snapshots(entries)
+        return rds_ok
+
+    return [
+        Stage("geocoding", lambda r: step_geocoding()),
+        Stage("weather", lambda r: step_weather(r["geocoding"]), deps=["geocoding"]),
+        Stage("scraping", lambda r: step_scraping()),
+        Stage("hotel_details", lambda r: step_hotel_details(r["scraping"]), deps=["scraping"]),
+        Stage(
+            "entity_resolution",
+            lambda r: step_entity_resolution(r["hotel_details"], r["geocoding"]),
+            deps=["hotel_details", "geocoding"],
+        ),
+        Stage(
+            "aggregation",
+            lambda r: step_aggregation(r["geocoding"], r["weather"], r["entity_resolution"])[0],
+            deps=["geocoding", "weather", "entity_resolution"],
+        ),
+        Stage(
+            "cdc",
+            lambda r: step_cdc(r["aggregation"], r["entity_resolution"]),
+            deps=["aggregation", "entity_resolution"],
+        ),
+        Stage(
+            "maps",
+            lambda r: step_maps(r["geocoding"], r["aggregation"], r["entity_resolution"]),
+            deps=["geocoding", "aggregation", "entity_resolution"],
+        ),
+        Stage(
+            "warehouse",
+            lambda r: step_warehouse(r["geocoding"], r["weather"], r["entity_resolution"]),
+            deps=["geocoding", "weather", "entity_resolution"],
+        ),
+        Stage("sensitivity", lambda r: step_sensitivity(r["aggregation"]), deps=["aggregation"]),
+        Stage("s3", s3_stage, deps=["cdc"]),
+        Stage("rds", rds_stage, deps=["cdc"]),
+        # LAKE : fusion des petits fichiers par ville
+        Stage("lake_compaction", lambda r: compact_lake(), deps=["geocoding", "weather", "scraping"]),
+    ]
 
-    s3_files = {
-        geo_path: "bloc1_kayak/geocoding.csv",
-        weather_path: "bloc1_kayak/weather_raw.csv",
-        hotels_raw: "bloc1_kayak/hotels_raw.csv",
-        dest_path: "bloc1_kayak/destinations_score.csv",
-        hotels_clean: "bloc1_kayak/hotels_clean.csv",
-    }
-    step_s3(s3_files)
 
-    # 7) RDS
-    step_rds(df_dest, df_hotels)
+def main():
+    print("🚀 Pipeline Kayak complet")
+    run_id = time.strftime("%Y%m%dT%H%M%S")
 
+    results, stages, error = {}, {}, None
+    try:
+        results, stages = run_dag(build_pipeline(run_id), max_workers=PIPELINE_WORKERS, fatal=(HardFailure,))
+    except DagError as e:
+        stages, error = e.report, e
+
+    cdc = results.get("cdc", {})
+    path, path_s = critical_path(stages, list(stages))
+    write_run_report({
+        "run_id": run_id,
+        "rows": {
+            "destinations": len(results["aggregation"]) if "aggregation" in results else None,
+            "hotels": len(results["entity_resolution"]) if "entity_resolution" in results else None,
+        },
+        "delta": {
+            sink: {table: entry["stats"] for table, entry in entries.items()}
+            for sink, entries in cdc.items()
+        },
+        "rds_delta_applied": results.get("rds", False),
+        "s3_delta_applied": results.get("s3", False),
+        "stages": stages,
+        "critical_path": {"stages": path, "seconds": round(path_s, 1)},
+    })
+
+    if error is not None:
+        raise error
     print("🎉 Pipeline terminé sans erreur (logique) !")
 
 
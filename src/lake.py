@@ -0,0 +1,151 @@
+"""
+Data lake partitionné (Parquet) :
+
+    reports/raw/source=<source>/run_date=<YYYY-MM-DD>/part-<ville>.parquet
+
+Un fichier par ville à l'écriture, fusionnés en part-00000.parquet par la compaction.
+Les lectures élaguent les partitions par date (répertoires) et par ville
+(noms de fichiers, ou stats Parquet une fois compacté).
+
+    python src/lake.py compact
+"""
+import re
+import sys
+import shutil
+import unicodedata
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+
+ROOT = Path(__file__).resolve().parents[1]
+LAKE = ROOT / "reports" / "raw"
+COMPACTED = "part-00000.parquet"
+
+
+# =====================================================================
+# 1) CHEMINS
+# =====================================================================
+def _slug(value):
+    value = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "na"
+
+
+def source_dir(source):
+    return LAKE / f"source={source}"
+
+
+def partition_dir(source, run_date):
+    return source_dir(source) / f"run_date={run_date}"
+
+
+def list_partitions(source):
+    """run_dates disponibles pour une source (triées)."""
+    base = source_dir(source)
+    if not base.exists():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in base.glob("run_date=*") if p.is_dir())
+
+
+# =====================================================================
+# 2) ÉCRITURE
+# =====================================================================
+def write_partition(df, source, run_date=None, part_by="city"):
+    """
+    Écrit le snapshot complet d'une source pour un run (partition remplacée :
+    relancer le pipeline le même jour reste idempotent).
+    """
+    run_date = run_date or date.today().isoformat()
+    out = partition_dir(source, run_date)
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    if part_by and part_by in df.columns:
+        for value, g in df.groupby(part_by, sort=False):
+            g.to_parquet(out / f"part-{_slug(value)}.parquet", index=False)
+    else:
+        df.to_parquet(out / COMPACTED, index=False)
+
+    print(f"🪣 Lake : {source}/run_date={run_date} ({len(df)} lignes)")
+    return out
+
+
+# =====================================================================
+# 3) COMPACTION
+# =====================================================================
+def compact_partition(source, run_date, sort_by="city"):
+    """Fusionne les petits part-*.parquet d'une partition en un seul fichier trié."""
+    part_dir = partition_dir(source, run_date)
+    parts = sorted(part_dir.glob("part-*.parquet"))
+    if len(parts) <= 1:
+        return False
+
+    df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    if sort_by in df.columns:
+        # trié par ville → stats min/max par row group exploitables par les filtres
+        df = df.sort_values(sort_by, kind="stable")
+
+    tmp = part_dir / f"{COMPACTED}.tmp"
+    df.to_parquet(tmp, index=False, row_group_size=5_000)
+    for p in parts:
+        p.unlink()
+    tmp.rename(part_dir / COMPACTED)
+    return True
+
+
+def compact_lake(sources=None):
+    """Compacte toutes les partitions qui ont encore plusieurs fichiers."""
+    sources = sources or [p.name.split("=", 1)[1] for p in LAKE.glob("source=*") if p.is_dir()]
+    n = 0
+    for source in sources:
+        for run_date in list_partitions(source):
+            n += compact_partition(source, run_date)
+    print(f"🧹 Compaction : {n} partitions fusionnées")
+    return n
+
+
+# =====================================================================
+# 4) LECTURE AVEC ÉLAGAGE
+# =====================================================================
+def read_lake(source, start=None, end=None, cities=None, latest=False, columns=None):
+    """
+    Lit une source du lake.
+    - start / end (YYYY-MM-DD, inclus) : seules les partitions de la plage sont ouvertes
+    - latest=True : uniquement le dernier run
+    - cities : seuls les fichiers de ces villes sont lus (ou filtre Parquet si compacté)
+    Ajoute une colonne run_date.
+    """
+    run_dates = list_partitions(source)
+    if start:
+        run_dates = [d for d in run_dates if d >= start]
+    if end:
+        run_dates = [d for d in run_dates if d <= end]
+    if latest:
+        run_dates = run_dates[-1:]
+
+    wanted = {_slug(c) for c in cities} if cities else None
+    filters = [("city", "in", list(cities))] if cities else None
+
+    frames = []
+    for run_date in run_dates:
+        for path in sorted(partition_dir(source, run_date).glob("part-*.parquet")):
+            if path.name == COMPACTED:
+                df = pd.read_parquet(path, columns=columns, filters=filters)
+            elif wanted is None or path.stem[len("part-"):] in wanted:
+                df = pd.read_parquet(path, columns=columns)
+            else:
+                continue
+            frames.append(df.assign(run_date=run_date))
+
+    if not frames:
+        return pd.DataFrame(columns=(columns or []) + ["run_date"])
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["compact"]:
+        compact_lake()
+    else:
+        print(__doc__)
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+# =====================================================================
+# COMPOSANTES DU SCORE (vectorisées : scalaires, arrays ou Series)
+# =====================================================================
+RAIN_CAP_7D = 50.0   # mm de pluie sur 7 jours → score pluie = 0
+
+
+def score_weather(temp_mean, rain_sum, rain_cap=RAIN_CAP_7D):
+    """
+    Score météo = 70% température (5°C → 0, 30°C → 1) + 30% absence de pluie.
+    rain_cap peut être un array (fenêtres de longueurs différentes).
+    """
+    temp_mean = np.asarray(temp_mean, dtype=float)
+    rain_sum = np.asarray(rain_sum, dtype=float)
+
+    score_temp = np.clip((temp_mean - 5) / 25, 0, 1)
+    score_rain = np.clip(1 - rain_sum / rain_cap, 0, 1)
+    return 0.7 * score_temp + 0.3 * score_rain
+
+
+def score_price(price_mean):
+    """50€ → 1, 200€ → 0 ; prix absent → 0.5 (neutre)."""
+    price_mean = np.asarray(price_mean, dtype=float)
+    score = np.clip(1 - (price_mean - 50) / 150, 0, 1)
+    return np.where(np.isnan(price_mean), 0.5, score)
+
+
+def score_review(score_mean):
+    """Note Booking 6 → 0, 9.5 → 1 ; note absente → 0.5 (neutre)."""
+    score_mean = np.asarray(score_mean, dtype=float)
+    score = np.clip((score_mean - 6) / 3.5, 0, 1)
+    return np.where(np.isnan(score_mean), 0.5, score)
+
+
+def normalize_weights(w_meteo, w_prix, w_hotel):
+    total = w_meteo + w_prix + w_hotel
+    if total <= 0:
+        return 1 / 3, 1 / 3, 1 / 3
+    return w_meteo / total, w_prix / total, w_hotel / total
@@ -0,0 +1,214 @@
+import re
+import json
+import time
+import random
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from scrapers.booking_scraper import USER_AGENTS, _get_driver
+
+
+DETAIL_COLUMNS = ["lat", "lon", "address", "stars", "review_count"]
+CACHE_COLUMNS = ["hotel_key", *DETAIL_COLUMNS, "source", "fetched_at"]
+# page incomplète (captcha, blocage) : on retente au bout de quelques heures, pas de ttl_days
+INCOMPLETE_TTL_HOURS = 12
+
+
+# -------------------------------------------------------------
+# CLÉ HÔTEL (stable entre les runs)
+# -------------------------------------------------------------
+def hotel_key(url, city=None, name=None):
+    """
+    Identifiant stable d'un hôtel.
+    On garde le chemin Booking (/hotel/fr/<slug>) sans langue ni query :
+    les paramètres de tracking changent à chaque recherche.
+    """
+    if isinstance(url, str) and url:
+        path = urlsplit(url).path
+        m = re.match(r"^(/hotel/[a-z]{2}/[^.]+)", path)
+        if m:
+            return m.group(1)
+    return f"{city}|{name}".lower()
+
+
+# -------------------------------------------------------------
+# PARSING PAGE DÉTAIL
+# -------------------------------------------------------------
+def _to_float(raw):
+    try:
+        return float(str(raw).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(raw):
+    digits = "".join(c for c in str(raw) if c.isdigit()) if raw is not None else ""
+    return int(digits) if digits else None
+
+
+def parse_hotel_page(html):
+    """Extrait lat/lon, adresse, étoiles et nombre d'avis d'une page hôtel."""
+    soup = BeautifulSoup(html, "lxml")
+    details = dict.fromkeys(DETAIL_COLUMNS)
+
+    # lat/lon : attribut data-atlas-latlng="48.61,-1.51"
+    node = soup.select_one("[data-atlas-latlng]")
+    if node:
+        parts = node["data-atlas-latlng"].split(",")
+        if len(parts) == 2:
+            details["lat"], details["lon"] = _to_float(parts[0]), _to_float(parts[1])
+
+    # JSON-LD schema.org/Hotel : adresse + avis
+    for script in soup.select("script[type='application/ld+json']"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or data.get("@type") != "Hotel":
+            continue
+
+        address = data.get("address") or {}
+        if isinstance(address, dict):
+            details["address"] = address.get("streetAddress")
+        rating = data.get("aggregateRating") or {}
+        details["review_count"] = _to_int(rating.get("reviewCount"))
+        break
+
+    # étoiles : un span par étoile
+    stars = soup.select_one("[data-testid='rating-stars'], [data-testid='rating-squares']")
+    if stars:
+        details["stars"] = len(stars.find_all("span")) or None
+
+    if details["address"] is None:
+        addr = soup.select_one(".hp_address_subtitle")
+        if addr:
+            details["address"] = addr.get_text(strip=True)
+
+    return details
+
+
+def _is_complete(details):
+    return details["lat"] is not None and details["lon"] is not None
+
+
+def _complete_mask(df):
+    return df["lat"].notna() & df["lon"].notna()
+
+
+# -------------------------------------------------------------
+# FETCH : HTTP D'ABORD, NAVIGATEUR EN SECOURS
+# -------------------------------------------------------------
+def fetch_details_http(url):
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "fr-FR,fr;q=0.9",
+    }
+    r = requests.get(url, headers=headers, timeout=15)
+    r.raise_for_status()
+    return parse_hotel_page(r.text)
+
+
+def fetch_details_browser(url):
+    driver = _get_driver()
+    driver.get(url)
+    time.sleep(random.uniform(2, 3))
+    return parse_hotel_page(driver.page_source)
+
+
+def fetch_hotel_details(urls, max_workers=6):
+    """
+    Récupère les détails de plusieurs hôtels.
+    - HTTP en parallèle (concurrence bornée par max_workers)
+    - les pages incomplètes / bloquées repassent par le Chrome partagé,
+      en séquentiel (un seul navigateur)
+    Retourne {url: (details, source)}.
+    """
+    results = {}
+    fallback = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_details_http, u): u for u in urls}
+        for fut in as_completed(futures):
+            url = futures[fut]
+            try:
+                details = fut.result()
+            except Exception as e:
+                print(f"[WARN] détail HTTP {url[:60]}…: {e}")
+                details = None
+
+            if details and _is_complete(details):
+                results[url] = (details, "http")
+            else:
+                fallback.append(url)
+
+    for url in fallback:
+        try:
+            details = fetch_details_browser(url)
+            results[url] = (details, "browser")
+        except Exception as e:
+            print(f"[ERR] détail navigateur {url[:60]}…: {e}")
+
+    return results
+
+
+# -------------------------------------------------------------
+# CACHE DÉTAILS (clé = hotel_key)
+# -------------------------------------------------------------
+def load_detail_cache(path):
+    if not path.exists():
+        return pd.DataFrame(columns=CACHE_COLUMNS)
+    df = pd.read_csv(path)
+    df["fetched_at"] = pd.to_datetime(df["fetched_at"], utc=True, errors="coerce")
+    return df.drop_duplicates("hotel_key", keep="last")
+
+
+def enrich_hotels(df_hotels, cache_path, ttl_days=30, max_workers=6):
+    """
+    Ajoute lat/lon/address/stars/review_count à df_hotels.
+    Seuls les hôtels absents du cache ou expirés sont visités : ttl_days pour une
+    fiche complète, INCOMPLETE_TTL_HOURS pour une page sans coordonnées (captcha).
+    Une page incomplète n'écrase jamais une fiche complète déjà en cache.
+    """
+    df = df_hotels.copy()
+    df["hotel_key"] = [
+        hotel_key(u, c, n) for u, c, n in zip(df["url"], df["city"], df["hotelName"])
+    ]
+
+    cache = load_detail_cache(cache_path)
+    now = datetime.now(timezone.utc)
+    complete = _complete_mask(cache)
+    fresh = cache[
+        (complete & (cache["fetched_at"] >= now - timedelta(days=ttl_days)))
+        | (~complete & (cache["fetched_at"] >= now - timedelta(hours=INCOMPLETE_TTL_HOURS)))
+    ]
+
+    todo = (
+        df[~df["hotel_key"].isin(fresh["hotel_key"]) & df["url"].notna()]
+        .drop_duplicates("hotel_key")
+    )
+    print(f"🔎 Détails hôtels : {len(todo)} à visiter, {len(df) - len(todo)} en cache")
+
+    if len(todo):
+        fetched = fetch_hotel_details(todo["url"].tolist(), max_workers=max_workers)
+        known_complete = set(cache.loc[complete, "hotel_key"])
+        new_rows = []
+        for key, url in zip(todo["hotel_key"], todo["url"]):
+            if url not in fetched:
+                continue
+            details, source = fetched[url]
+            if not _is_complete(details) and key in known_complete:
+                continue
+            new_rows.append({"hotel_key": key, **details, "source": source, "fetched_at": now})
+
+        if new_rows:
+            cache = pd.concat([cache, pd.DataFrame(new_rows)], ignore_index=True)
+            cache = cache.drop_duplicates("hotel_key", keep="last")
+            cache.to_csv(cache_path, index=False, encoding="utf-8-sig")
+
+    df = df.drop(columns=[c for c in DETAIL_COLUMNS if c in df.columns])
+    return df.merge(cache[["hotel_key", *DETAIL_COLUMNS]], on="hotel_key", how="left")
@@ -58,101 +58,117 @@ def _get_driver():
     return GLOBAL_DRIVER
 
 
+def reset_driver():
+    """Ferme le Chrome partagé : le prochain _get_driver() repart avec un nouveau UA."""
+    global GLOBAL_DRIVER
+
+    if GLOBAL_DRIVER is not None:
+        try:
+            GLOBAL_DRIVER.quit()
+        except Exception:
+            pass
+    GLOBAL_DRIVER = None
+
+
 # -------------------------------------------------------------
-# SCRAPER COMPATIBLE AVEC TON ETL (city, max_hotels, retries)
+# UNE TENTATIVE DE SCRAPING (les erreurs remontent à l'appelant)
 # -------------------------------------------------------------
-def scrape_booking(city, max_hotels=20, retries=3):
+def scrape_city_once(city, max_hotels=20):
 
     url = build_url(city)
+    driver = _get_driver()
+    driver.get(url)
+    time.sleep(3)
 
-    for attempt in range(1, retries + 1):
-        print(f"Scraping Booking --> {city} (tentative {attempt}/{retries})")
+    # 🔥 ESSENTIEL : accepter les cookies si présent
+    try:
+        btn = driver.find_element(By.CSS_SELECTOR, "button[aria-label='Accepter']")
+        btn.click()
+        time.sleep(1)
+    except:
+        pass
+
+    # 🔥 SIMULER UN HUMAIN : scroll progressif + pause + mouvement souris
+    last_height = 0
+    for _ in range(10):  # 10 scrolls => charge ~40 hôtels
+        driver.execute_script("window.scrollBy(0, 1200);")
+        time.sleep(random.uniform(0.6, 1.2))
+
+        # petit mouvement de souris : casse les anti-bots
+        try:
+            driver.execute_script(
+                "document.querySelector('body').dispatchEvent(new MouseEvent('mousemove', "
+                "{clientX:100, clientY:200}))"
+            )
+        except:
+            pass
+
+        new_height = driver.execute_script("return document.body.scrollHeight;")
+        if new_height == last_height:
+            break
+        last_height = new_height
+
+    # 🔥 Maintenant on récupère tous les cards
+    cards = driver.find_elements(By.CSS_SELECTOR, "[data-testid='property-card']")
+    hotels = []
 
+    for card in cards[:max_hotels]:
+
+        # name
+        try:
+            name = card.find_element(By.CSS_SELECTOR, "[data-testid='title']").text.strip()
+        except:
+            continue
+
+        # score
         try:
-            driver = _get_driver()
-            driver.get(url)
-            time.sleep(3)
-
-            # 🔥 ESSENTIEL : accepter les cookies si présent
-            try:
-                btn = driver.find_element(By.CSS_SELECTOR, "button[aria-label='Accepter']")
-                btn.click()
-                time.sleep(1)
-            except:
-                pass
-
-            # 🔥 SIMULER UN HUMAIN : scroll progressif + pause + mouvement souris
-            last_height = 0
-            for _ in range(10):  # 10 scrolls => charge ~40 hôtels
-                driver.execute_script("window.scrollBy(0, 1200);")
-                time.sleep(random.uniform(0.6, 1.2))
-
-                # petit mouvement de souris : casse les anti-bots
-                try:
-                    driver.execute_script(
-                        "document.querySelector('body').dispatchEvent(new MouseEvent('mousemove', "
-                        "{clientX:100, clientY:200}))"
-                    )
-                except:
-                    pass
-
-                new_height = driver.execute_script("return document.body.scrollHeight;")
-                if new_height == last_height:
-                    break
-                last_height = new_height
-
-            # 🔥 Maintenant on récupère tous les cards
-            cards = driver.find_elements(By.CSS_SELECTOR, "[data-testid='property-card']")
-            hotels = []
-
-            for card in cards[:max_hotels]:
-
-                # name
-                try:
-                    name = card.find_element(By.CSS_SELECTOR, "[data-testid='title']").text.strip()
-                except:
-                    continue
-
-                # score
-                try:
-                    score_raw = card.find_element(By.CSS_SELECTOR, "[data-testid='review-score']").text.strip()
-                    score = extract_score(score_raw)
-                except:
-                    score = None
-
-                if not name or score is None:
-                    continue
-
-                # price
-                price = None
-                try:
-                    price_raw = card.find_element(By.CSS_SELECTOR, "[data-testid='price-and-discounted-price']").text
-                    digits = "".join(c for c in price_raw if c.isdigit())
-                    price = int(digits) if digits else None
-                except:
-                    pass
-
-                # url
-                try:
-                    url_hotel = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-                except:
-                    url_hotel = None
-
-                hotels.append({
-                    "city": city,
-                    "hotelName": name,
-                    "score": score,
-                    "price_eur": price,
-                    "url": url_hotel
-                })
-
-            # NE PAS FERMER LE NAVIGATEUR
-            # driver.quit()  ❌ on enlève
+            score_raw = card.find_element(By.CSS_SELECTOR, "[data-testid='review-score']").text.strip()
+            score = extract_score(score_raw)
+        except:
+            score = None
+
+        if not name or score is None:
+            continue
+
+        # price
+        price = None
+        try:
+            price_raw = card.find_element(By.CSS_SELECTOR, "[data-testid='price-and-discounted-price']").text
+            digits = "".join(c for c in price_raw if c.isdigit())
+            price = int(digits) if digits else None
+        except:
             pass
 
+        # url
+        try:
+            url_hotel = card.find_element(By.TAG_NAME, "a").get_attribute("href")
+        except:
+            url_hotel = None
+
+        hotels.append({
+            "city": city,
+            "hotelName": name,
+            "score": score,
+            "price_eur": price,
+            "url": url_hotel
+        })
+
+    # NE PAS FERMER LE NAVIGATEUR (réutilisé par la ville suivante)
+    print(f"➡️ Hotels trouvés = {len(hotels)}")
+    return hotels
 
-            print(f"➡️ Hotels trouvés = {len(hotels)}")
-            if len(hotels) >= 10:  # on accepte à partir de 10
+
+# -------------------------------------------------------------
+# SCRAPER COMPATIBLE AVEC TON ETL (city, max_hotels, retries)
+# -------------------------------------------------------------
+def scrape_booking(city, max_hotels=20, retries=3, min_hotels=10):
+
+    for attempt in range(1, retries + 1):
+        print(f"Scraping Booking --> {city} (tentative {attempt}/{retries})")
+
+        try:
+            hotels = scrape_city_once(city, max_hotels=max_hotels)
+            if len(hotels) >= min_hotels:  # on accepte à partir de min_hotels
                 return hotels
 
             print("⚠️ Pas assez d'hôtels, retry...")
@@ -0,0 +1,118 @@
+import time
+import heapq
+import random
+import traceback
+
+from scrapers.booking_scraper import scrape_city_once, reset_driver
+
+
+# -------------------------------------------------------------
+# ORDONNANCEUR DE RETRIES (backoff + jitter + circuit breaker)
+# -------------------------------------------------------------
+class RetryScheduler:
+    """
+    File de villes à scraper avec retries non bloquants :
+    - une ville en échec repart dans la file avec un backoff exponentiel + jitter,
+      les autres villes passent pendant qu'elle attend
+    - après `breaker_threshold` échecs consécutifs (exception / 0 hôtel = blocage),
+      le circuit s'ouvre : driver redémarré (nouvel UA) + pause `breaker_cooldown`
+    - seuil d'acceptation par ville ; au dernier essai on garde le meilleur résultat vu
+    """
+
+    def __init__(
+        self,
+        scrape_fn=scrape_city_once,
+        max_attempts=3,
+        base_delay=5.0,
+        max_delay=120.0,
+        jitter=0.5,
+        breaker_threshold=3,
+        breaker_cooldown=30.0,
+        on_breaker=reset_driver,
+    ):
+        self.scrape_fn = scrape_fn
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.on_breaker = on_breaker
+
+        self.consecutive_failures = 0
+        self.breaker_trips = 0
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures < self.breaker_threshold:
+            return
+
+        self.breaker_trips += 1
+        print(f"🔌 Circuit ouvert ({self.consecutive_failures} échecs d'affilée) → redémarrage driver")
+        try:
+            self.on_breaker()
+        except Exception as e:
+            print(f"[ERR] redémarrage driver: {e}")
+        time.sleep(self.breaker_cooldown)
+        self.consecutive_failures = 0
+
+    def run(self, cities, max_hotels=20, min_hotels=None, default_min=10):
+        """
+        Scrape toutes les villes. min_hotels = {ville: seuil} (défaut default_min).
+        Retourne {ville: [hôtels]} — liste vide si rien n'a jamais été récupéré.
+        """
+        min_hotels = min_hotels or {}
+        queue = [(0.0, i, city, 1) for i, city in enumerate(cities)]
+        heapq.heapify(queue)
+        seq = len(queue)
+
+        best = {city: [] for city in cities}
+        done = {}
+
+        while queue:
+            ready_at, _, city, attempt = heapq.heappop(queue)
+
+            # rien d'autre n'est prêt : on attend la prochaine ville éligible
+            wait = ready_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            threshold = min_hotels.get(city, default_min)
+            print(f"Scraping Booking --> {city} (tentative {attempt}/{self.max_attempts}, seuil {threshold})")
+
+            try:
+                hotels = self.scrape_fn(city, max_hotels=max_hotels)
+            except Exception as e:
+                print(f"[ERR] {city}: {e}")
+                traceback.print_exc()
+                hotels = None
+
+            if hotels:
+                self.consecutive_failures = 0
+                if len(hotels) > len(best[city]):
+                    best[city] = hotels
+            else:
+                self._record_failure()
+
+            if hotels and len(hotels) >= threshold:
+                done[city] = hotels
+                continue
+
+            if attempt < self.max_attempts:
+                delay = self.backoff(attempt)
+                print(f"⚠️ {city} : {len(hotels or [])}/{threshold} hôtels → retry dans {delay:.0f}s")
+                heapq.heappush(queue, (time.monotonic() + delay, seq, city, attempt + 1))
+                seq += 1
+                continue
+
+            done[city] = best[city]
+            if best[city]:
+                print(f"⚠️ {city} : seuil non atteint, on garde {len(best[city])} hôtels")
+            else:
+                print(f"[FATAL] Échec scraping Booking : {city}")
+
+        return {city: done[city] for city in cities}
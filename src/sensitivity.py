@@ -0,0 +1,149 @@
+"""
+Sensibilité du classement aux poids (météo / prix / qualité hôtels).
+
+Des milliers de vecteurs de poids sont tirés sur le simplexe (Dirichlet),
+toutes les villes sont scorées d'un coup (villes × 3) @ (3 × tirages),
+puis on mesure pour chaque ville la distribution de son rang.
+
+    center=None      → tous les poids possibles (Dirichlet uniforme)
+    center=(w1,w2,w3) → petites variations autour des poids du dashboard
+"""
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoring import RAIN_CAP_7D, score_weather, score_price, score_review, normalize_weights
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "reports" / "processed" / "sensitivity"
+
+N_SAMPLES = 5_000
+CONCENTRATION = 100      # plus grand = tirages plus serrés autour de center
+TOP_K = 5
+CACHE_MAX_FILES = 256    # au-delà, les pickles les moins récemment lus sont supprimés
+VERSION_DECIMALS = 9     # pandas (ETL) et DuckDB avg (warehouse) diffèrent vers 1e-15
+
+# (seuil p_top5, libellé) — du plus stable au moins stable
+TIERS = [
+    (0.90, "Top stable"),
+    (0.50, "Top probable"),
+    (0.10, "Top possible"),
+    (0.00, "Hors top"),
+]
+
+
+# =====================================================================
+# 1) ENTRÉES
+# =====================================================================
+def component_matrix(df_dest, rain_cap=RAIN_CAP_7D):
+    """Composantes de score par ville (villes × 3 : météo, prix, qualité)."""
+    return np.column_stack([
+        score_weather(df_dest["temp_mean"], df_dest["rain_sum"], rain_cap),
+        score_price(df_dest["price_mean"]),
+        score_review(df_dest["score_mean"]),
+    ])
+
+
+def sample_weights(n_samples=N_SAMPLES, center=None, concentration=CONCENTRATION, seed=0):
+    """Tirages (n × 3) sur le simplexe, uniformes ou centrés sur `center`."""
+    rng = np.random.default_rng(seed)
+    if center is None:
+        alpha = np.ones(3)
+    else:
+        alpha = np.asarray(normalize_weights(*center)) * concentration + 1e-3
+    return rng.dirichlet(alpha, size=n_samples)
+
+
+# =====================================================================
+# 2) ANALYSE
+# =====================================================================
+def rank_matrix(scores):
+    """Rangs (1 = meilleur) par colonne de scores (villes × tirages)."""
+    order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[0] + 1)[:, None], axis=0)
+    return ranks
+
+
+def tier_of(p_top):
+    for threshold, label in TIERS:
+        if p_top >= threshold:
+            return label
+    return TIERS[-1][1]
+
+
+def analyze(cities, components, n_samples=N_SAMPLES, center=None,
+            concentration=CONCENTRATION, top_k=TOP_K, seed=0):
+    """
+    Retourne (summary, distribution) :
+    - summary : une ligne par ville (rang moyen, p5 / médiane / p95, P(top 1), P(top k), tier)
+    - distribution : matrice villes × rangs, distribution[i, r-1] = P(ville i au rang r)
+    """
+    weights = sample_weights(n_samples, center, concentration, seed)
+    scores = components @ weights.T                     # villes × tirages
+    ranks = rank_matrix(scores)
+
+    n_cities = len(cities)
+    flat = np.repeat(np.arange(n_cities), n_samples) * n_cities + (ranks.ravel() - 1)
+    distribution = np.bincount(flat, minlength=n_cities * n_cities).reshape(n_cities, n_cities) / n_samples
+
+    p_top = (ranks <= top_k).mean(axis=1)
+    summary = pd.DataFrame({
+        "city": cities,
+        "rank_mean": ranks.mean(axis=1).round(2),
+        "rank_p05": np.percentile(ranks, 5, axis=1),
+        "rank_median": np.median(ranks, axis=1),
+        "rank_p95": np.percentile(ranks, 95, axis=1),
+        "p_top1": (ranks == 1).mean(axis=1).round(3),
+        f"p_top{top_k}": p_top.round(3),
+        "tier": [tier_of(p) for p in p_top],
+    })
+    summary = summary.sort_values(["rank_mean", "city"], ignore_index=True)
+    return summary, distribution
+
+
+# =====================================================================
+# 3) CACHE PAR VERSION DE DONNÉES
+# =====================================================================
+def dataset_version(cities, components):
+    h = hashlib.blake2b(digest_size=8)
+    h.update("\x1f".join(map(str, cities)).encode())
+    rounded = np.round(np.asarray(components, dtype=float), VERSION_DECIMALS) + 0.0   # -0.0 → 0.0
+    h.update(np.ascontiguousarray(rounded).tobytes())
+    return h.hexdigest()
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_files=CACHE_MAX_FILES):
+    """Garde les max_files pickles les plus récemment utilisés (mtime)."""
+    files = sorted(cache_dir.glob("*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in files[max_files:]:
+        path.unlink(missing_ok=True)
+
+
+def cached_analysis(df_dest, rain_cap=RAIN_CAP_7D, cache_dir=CACHE_DIR, **params):
+    """analyze() mémorisé sur disque par (version des données, paramètres)."""
+    # version indépendante de l'ordre des lignes (ETL vs dashboard)
+    df_dest = df_dest.sort_values("city")
+    cities = df_dest["city"].tolist()
+    components = component_matrix(df_dest, rain_cap)
+
+    center = params.setdefault("center", None)
+    if center is not None:
+        params["center"] = tuple(round(w, 4) for w in normalize_weights(*center))
+    key = dataset_version(cities, components) + "-" + hashlib.blake2b(
+        repr(sorted(params.items())).encode(), digest_size=4
+    ).hexdigest()
+
+    path = cache_dir / f"{key}.pkl"
+    if path.exists():
+        path.touch()                # LRU : date de dernière lecture
+        return pd.read_pickle(path)
+
+    result = analyze(cities, components, **params)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    pd.to_pickle(result, path)
+    prune_cache(cache_dir)
+    return result
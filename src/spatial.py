@@ -0,0 +1,181 @@
+"""
+Index spatial des destinations (KD-tree sur la sphère unité).
+
+Les points sont projetés en 3D (x, y, z) : la distance euclidienne (corde)
+est monotone avec la distance orthodromique, donc rayon / k plus proches
+voisins sont exacts sans projection locale.
+
+    idx = SpatialIndex.from_geo(df_geo)
+    idx.within_city("Avignon", 50)        # destinations à moins de 50 km
+    idx.nearest_city("Colmar", 3)         # 3 plus proches voisins
+    cluster_destinations(df_geo, 10)      # regroupement Colmar / Eguisheim / …
+
+    python src/spatial.py bench
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+# =====================================================================
+# 1) CONVERSIONS
+# =====================================================================
+def to_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+# =====================================================================
+# 2) INDEX
+# =====================================================================
+class SpatialIndex:
+    def __init__(self, keys, lat, lon):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        ok = ~(np.isnan(lat) | np.isnan(lon))
+
+        self.keys = np.asarray(keys, dtype=object)[ok]
+        self.lat, self.lon = lat[ok], lon[ok]
+        self.pos = {k: i for i, k in enumerate(self.keys)}
+        self.tree = cKDTree(to_xyz(self.lat, self.lon))
+
+    @classmethod
+    def from_geo(cls, df_geo, key="city"):
+        return cls(df_geo[key].to_numpy(), df_geo["lat"].to_numpy(), df_geo["lon"].to_numpy())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _frame(self, idx, chord):
+        return pd.DataFrame({
+            "key": self.keys[idx],
+            "lat": self.lat[idx],
+            "lon": self.lon[idx],
+            "distance_km": chord_to_km(np.asarray(chord)).round(2),
+        })
+
+    # -----------------------------------------------------------------
+    def within(self, lat, lon, radius_km):
+        """Points à moins de radius_km de (lat, lon), du plus proche au plus loin."""
+        q = to_xyz(lat, lon)[0]
+        idx = np.asarray(self.tree.query_ball_point(q, km_to_chord(radius_km)), dtype=int)
+        chord = np.linalg.norm(self.tree.data[idx] - q, axis=1)
+        order = np.argsort(chord, kind="stable")
+        return self._frame(idx[order], chord[order])
+
+    def nearest(self, lat, lon, k=5):
+        k = min(k, len(self))
+        chord, idx = self.tree.query(to_xyz(lat, lon)[0], k=k)
+        return self._frame(np.atleast_1d(idx), np.atleast_1d(chord))
+
+    def within_city(self, key, radius_km):
+        i = self.pos[key]
+        df = self.within(self.lat[i], self.lon[i], radius_km)
+        return df[df["key"] != key].reset_index(drop=True)
+
+    def nearest_city(self, key, k=5):
+        i = self.pos[key]
+        df = self.nearest(self.lat[i], self.lon[i], k + 1)
+        return df[df["key"] != key].head(k).reset_index(drop=True)
+
+    # -----------------------------------------------------------------
+    def clusters(self, radius_km):
+        """
+        Regroupement par lien simple : deux points à moins de radius_km sont
+        dans le même cluster (composantes connexes du graphe de voisinage).
+        """
+        pairs = self.tree.query_pairs(km_to_chord(radius_km), output_type="ndarray")
+        n = len(self)
+        graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+
+# =====================================================================
+# 3) CLUSTERS DE DESTINATIONS (travail partagé en aval)
+# =====================================================================
+def cluster_destinations(df_geo, radius_km, key="city"):
+    """
+    Ajoute cluster_id et is_representative à df_geo. Le représentant est le membre
+    le plus proche du centre du cluster : c'est lui qui porte l'appel API partagé.
+    Les lignes sans coordonnées restent hors cluster (cluster_id = -1).
+    """
+    df = df_geo.copy()
+    df["cluster_id"] = -1
+    df["is_representative"] = False
+
+    idx = SpatialIndex.from_geo(df, key=key)
+    if not len(idx):
+        return df
+
+    labels = idx.clusters(radius_km)
+    xyz = idx.tree.data
+    centers = np.zeros((labels.max() + 1, 3))
+    np.add.at(centers, labels, xyz)
+    dist = np.linalg.norm(xyz - centers[labels] / np.bincount(labels)[labels][:, None], axis=1)
+
+    reps = pd.DataFrame({"label": labels, "dist": dist}).sort_values("dist").drop_duplicates("label").index
+    is_rep = np.zeros(len(idx), dtype=bool)
+    is_rep[reps] = True
+
+    by_key = pd.DataFrame({key: idx.keys, "cluster_id": labels, "is_representative": is_rep})
+    df = df.drop(columns=["cluster_id", "is_representative"]).merge(by_key, on=key, how="left")
+    df["cluster_id"] = df["cluster_id"].fillna(-1).astype(int)
+    df["is_representative"] = df["is_representative"].fillna(False).astype(bool)
+    return df
+
+
+# =====================================================================
+# 4) BENCH
+# =====================================================================
+def bench(sizes=(1_000, 10_000, 100_000), radius_km=10, k=10, n_queries=1_000):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        # France métropolitaine approx.
+        lat = rng.uniform(42.3, 51.1, n)
+        lon = rng.uniform(-4.8, 8.2, n)
+
+        t0 = time.perf_counter()
+        idx = SpatialIndex(np.arange(n), lat, lon)
+        t_build = time.perf_counter() - t0
+
+        q = rng.integers(0, n, n_queries)
+        t0 = time.perf_counter()
+        hits = sum(len(idx.within(lat[i], lon[i], radius_km)) for i in q)
+        t_radius = (time.perf_counter() - t0) / n_queries
+
+        t0 = time.perf_counter()
+        idx.tree.query(to_xyz(lat[q], lon[q]), k=k)
+        t_knn = (time.perf_counter() - t0) / n_queries
+
+        t0 = time.perf_counter()
+        n_clusters = idx.clusters(radius_km / 5).max() + 1
+        t_cluster = time.perf_counter() - t0
+
+        print(f"📊 n={n:>7} build {t_build * 1e3:7.1f}ms | rayon {radius_km}km {t_radius * 1e6:7.1f}µs/req "
+              f"(~{hits / n_queries:.0f} pts) | {k}-NN {t_knn * 1e6:6.1f}µs/req | "
+              f"clusters {radius_km / 5:.0f}km {t_cluster * 1e3:7.1f}ms ({n_clusters})")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["bench"]:
+        bench()
+    else:
+        print(__doc__)
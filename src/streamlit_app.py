@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
+from datetime import date, timedelta
+
+from scoring import score_weather, score_price, score_review, RAIN_CAP_7D
+from trip_planner import plan_trips
+from warehouse import WAREHOUSE_PATH, query
+from sensitivity import cached_analysis
+from lake import read_lake, list_partitions
 
 # ---------------------------------------------------------
 # CONFIG
@@ -116,12 +123,56 @@ DATA_PROC = ROOT / "reports" / "processed"
 
 DEST_PATH = DATA_PROC / "destinations_score.csv"
 HOTELS_PATH = DATA_PROC / "hotels_clean.csv"
+WEATHER_PATH = ROOT / "reports" / "raw" / "weather_raw.csv"
+WEATHER_HISTORY_DAYS = 30
+
+# warehouse DuckDB si présent (agrégats SQL), sinon CSV processed
+USE_WAREHOUSE = WAREHOUSE_PATH.exists()
+DATA_VERSION = (WAREHOUSE_PATH if USE_WAREHOUSE else DEST_PATH).stat().st_mtime_ns
+
+@st.cache_data
+def load_destinations(version):
+    if USE_WAREHOUSE:
+        return query("""
+            SELECT city, temp_mean, rain_sum, price_mean, score_mean, lat, lon
+            FROM mart_city_summary
+        """)
+    return pd.read_csv(DEST_PATH)
+
+@st.cache_data
+def load_city_hotels(city, limit, version):
+    if USE_WAREHOUSE:
+        return query("""
+            SELECT hotelName, score_num AS score, price_eur, url
+            FROM dim_hotel
+            WHERE city = ?
+            ORDER BY score_num DESC NULLS LAST
+            LIMIT ?
+        """, [city, limit])
+    df = pd.read_csv(HOTELS_PATH)
+    df = df[df["city"] == city].sort_values("score", ascending=False)
+    return df[["hotelName","score","price_eur","url"]].head(limit)
+
+@st.cache_data
+def load_trip_plan(version):
+    # fenêtres météo brutes (toutes dates de départ × durées)
+    if USE_WAREHOUSE:
+        df_weather = query("SELECT city, strftime(date, '%Y-%m-%d') AS date, temp_day, rain FROM v_weather_latest")
+    elif list_partitions("weather"):
+        # dernier run du lake (les autres partitions ne sont pas ouvertes)
+        df_weather = read_lake("weather", latest=True, columns=["city", "date", "temp_day", "rain"])
+    else:
+        df_weather = pd.read_csv(WEATHER_PATH)
+    return plan_trips(df_weather, w_meteo=1, w_prix=0, w_hotel=0)
 
 @st.cache_data
-def load_data():
-    return pd.read_csv(DEST_PATH), pd.read_csv(HOTELS_PATH)
+def load_weather_history(city, version):
+    # prévisions successives d'une ville : élagage par date (répertoires) et ville (fichiers)
+    start = (date.today() - timedelta(days=WEATHER_HISTORY_DAYS)).isoformat()
+    return read_lake("weather", start=start, cities=[city], columns=["city", "date", "temp_day", "rain"])
 
-df_dest, df_hotels = load_data()
+df_dest = load_destinations(DATA_VERSION)
+df_plan = load_trip_plan(DATA_VERSION)
 
 # ---------------------------------------------------------
 # SIDEBAR – SCORING
@@ -138,14 +189,31 @@ w_prix /= total
 w_hotel /= total
 
 # ---------------------------------------------------------
-# SCORING
+# SIDEBAR – DATES DU VOYAGE
 # ---------------------------------------------------------
-df_dest["score_temp"] = ((df_dest["temp_mean"] - 5) / 25).clip(0, 1)
-df_dest["score_rain"] = (1 - df_dest["rain_sum"] / 50).clip(0, 1)
-df_dest["score_weather"] = 0.7 * df_dest["score_temp"] + 0.3 * df_dest["score_rain"]
+st.sidebar.header("🗓️ Dates du voyage")
+
+trip_starts = sorted(df_plan["start"].unique())
+trip_start = st.sidebar.selectbox("Départ", ["Toute la prévision"] + trip_starts)
 
-df_dest["score_price"] = (1 - ((df_dest["price_mean"] - 50) / 150)).clip(0, 1).fillna(0.5)
-df_dest["score_review"] = ((df_dest["score_mean"] - 6) / 3.5).clip(0, 1).fillna(0.5)
+trip_days = len(trip_starts)
+if trip_start != "Toute la prévision":
+    max_days = trip_days - trip_starts.index(trip_start)
+    trip_days = st.sidebar.slider("Durée (jours)", 1, max_days, min(3, max_days))
+
+    # météo restreinte à la fenêtre choisie
+    df_window = df_plan[(df_plan["start"] == trip_start) & (df_plan["length"] == trip_days)]
+    df_dest = df_dest.drop(columns=["temp_mean", "rain_sum"]).merge(
+        df_window[["city", "temp_mean", "rain_sum"]], on="city", how="left"
+    )
+
+# ---------------------------------------------------------
+# SCORING
+# ---------------------------------------------------------
+rain_cap = RAIN_CAP_7D * trip_days / 7
+df_dest["score_weather"] = score_weather(df_dest["temp_mean"], df_dest["rain_sum"], rain_cap)
+df_dest["score_price"] = score_price(df_dest["price_mean"])
+df_dest["score_review"] = score_review(df_dest["score_mean"])
 
 df_dest["destination_score"] = (
     w_meteo * df_dest["score_weather"] +
@@ -222,13 +290,21 @@ if selected_city != "Toutes les destinations":
     c1.metric("Rang", int(row["rank"]))
     c2.metric("Score", f"{row['score_norm_100']:.1f}/100")
     c3.metric("Temp. moy", f"{row['temp_mean']:.1f}°C")
-    c4.metric("Pluie 7j", f"{row['rain_sum']:.1f} mm")
+    c4.metric(f"Pluie {trip_days}j", f"{row['rain_sum']:.1f} mm")
 
-    df_hot_city = df_hotels[df_hotels["city"] == selected_city].copy()
-    df_hot_city = df_hot_city.sort_values("score", ascending=False).head(top_n_hotels)
+    df_hot_city = load_city_hotels(selected_city, top_n_hotels, DATA_VERSION)
 
     st.markdown("### 🏨 Hôtels recommandés")
-    st.dataframe(df_hot_city[["hotelName","score","price_eur","url"]], hide_index=True)
+    st.dataframe(df_hot_city, hide_index=True)
+
+    df_hist = load_weather_history(selected_city, DATA_VERSION)
+    if df_hist["run_date"].nunique() > 1:
+        st.markdown(f"### 📈 Prévisions successives ({WEATHER_HISTORY_DAYS} derniers jours)")
+        fig_hist = px.line(
+            df_hist.sort_values(["run_date", "date"]), x="date", y="temp_day", color="run_date",
+            labels={"date": "Jour prévu", "temp_day": "Temp. (°C)", "run_date": "Prévision du"},
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
 else:
     st.info("Sélectionner une destination pour afficher les détails.")
 
@@ -259,6 +335,36 @@ st.dataframe(
     use_container_width=True, hide_index=True
 )
 
+# ---------------------------------------------------------
+# 🎲 STABILITÉ DU CLASSEMENT
+# ---------------------------------------------------------
+st.subheader("🎲 Stabilité du classement")
+
+sens_mode = st.radio(
+    "Variations des poids",
+    ["Autour des poids actuels", "Tous les poids possibles"],
+    horizontal=True,
+)
+sens_center = (w_meteo, w_prix, w_hotel) if sens_mode == "Autour des poids actuels" else None
+
+@st.cache_data
+def load_sensitivity(df, rain_cap, center):
+    return cached_analysis(df, rain_cap=rain_cap, center=center)
+
+df_sens, _ = load_sensitivity(
+    df_dest[["city", "temp_mean", "rain_sum", "price_mean", "score_mean"]], rain_cap, sens_center
+)
+df_sens = df_sens.merge(df_dest[["city", "rank"]], on="city")
+
+st.dataframe(
+    df_sens[["rank", "city", "tier", "p_top1", "p_top5", "rank_p05", "rank_median", "rank_p95"]].head(15),
+    use_container_width=True, hide_index=True
+)
+st.caption(
+    "5 000 jeux de poids tirés sur le simplexe : P(top 5) = part des tirages où la ville "
+    "reste dans les 5 premières ; p05–p95 = plage de rangs observée."
+)
+
 # ---------------------------------------------------------
 # SCORING EXPLANATION
 # ---------------------------------------------------------
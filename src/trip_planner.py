@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from scoring import RAIN_CAP_7D, score_weather, score_price, score_review, normalize_weights
+
+
+# =====================================================================
+# 1) MATRICE VILLE × JOUR
+# =====================================================================
+def daily_matrix(df_weather):
+    """
+    Pivote weather_raw en matrices denses (villes × jours).
+    Sans colonne `date` (anciens fichiers), le jour = rang dans la prévision.
+    Retourne (cities, days, temp, rain) — NaN pour les jours manquants.
+    """
+    df = df_weather.copy()
+    if "date" in df.columns:
+        df["day"] = df["date"].astype(str)
+    else:
+        df["day"] = [f"J+{i}" for i in df.groupby("city").cumcount()]
+
+    temp = df.pivot_table(index="city", columns="day", values="temp_day", aggfunc="mean", sort=True)
+    rain = df.pivot_table(index="city", columns="day", values="rain", aggfunc="sum", sort=True)
+    rain = rain.reindex(index=temp.index, columns=temp.columns)
+
+    if "date" not in df.columns:
+        order = sorted(temp.columns, key=lambda d: int(d[2:]))
+        temp, rain = temp[order], rain[order]
+
+    return (
+        temp.index.to_list(),
+        temp.columns.to_list(),
+        temp.to_numpy(dtype=float),
+        rain.to_numpy(dtype=float),
+    )
+
+
+# =====================================================================
+# 2) FENÊTRES GLISSANTES (sommes cumulées)
+# =====================================================================
+def window_index(n_days, max_length=None):
+    """Toutes les fenêtres (début, longueur) tenant dans la prévision."""
+    max_length = max_length or n_days
+    starts, lengths = np.meshgrid(np.arange(n_days), np.arange(1, max_length + 1), indexing="ij")
+    keep = starts + lengths <= n_days
+    return starts[keep], lengths[keep]
+
+
+def _prefix(m):
+    """Somme cumulée avec une colonne de zéros en tête (NaN ignorés)."""
+    return np.concatenate([np.zeros((m.shape[0], 1)), np.nancumsum(m, axis=1)], axis=1)
+
+
+def window_aggregates(temp, rain, starts, lengths):
+    """
+    temp moyenne et pluie cumulée pour chaque ville × fenêtre, en un passage :
+    somme[s, s+L) = P[s+L] - P[s].
+    """
+    ends = starts + lengths
+
+    p_temp = _prefix(temp)
+    p_rain = _prefix(rain)
+    p_days = _prefix((~np.isnan(temp)).astype(float))
+
+    n_days = p_days[:, ends] - p_days[:, starts]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        temp_mean = (p_temp[:, ends] - p_temp[:, starts]) / n_days
+    rain_sum = p_rain[:, ends] - p_rain[:, starts]
+    return temp_mean, rain_sum
+
+
+# =====================================================================
+# 3) PLANIFICATEUR
+# =====================================================================
+def plan_trips(df_weather, df_dest=None, w_meteo=0.6, w_prix=0.4, w_hotel=0.0, max_length=None):
+    """
+    Score de chaque ville pour chaque (jour de départ, durée).
+    La pluie est comparée à un plafond proportionnel à la durée
+    (50 mm / 7 jours), pour que les séjours courts restent comparables.
+    Prix / qualité hôtels viennent de df_dest (constants sur la fenêtre).
+
+    Retourne un DataFrame long : start, length, city, temp_mean, rain_sum, score, rank.
+    """
+    cities, days, temp, rain = daily_matrix(df_weather)
+    starts, lengths = window_index(len(days), max_length)
+    temp_mean, rain_sum = window_aggregates(temp, rain, starts, lengths)
+
+    rain_cap = RAIN_CAP_7D * lengths / 7
+    s_weather = score_weather(temp_mean, rain_sum, rain_cap)
+    s_weather = np.where(np.isnan(temp_mean), 0.0, s_weather)
+
+    w_meteo, w_prix, w_hotel = normalize_weights(w_meteo, w_prix, w_hotel)
+    if df_dest is not None:
+        dest = df_dest.set_index("city").reindex(cities)
+        s_price = score_price(dest["price_mean"])[:, None]
+        s_review = score_review(dest["score_mean"])[:, None]
+    else:
+        s_price = s_review = np.full((len(cities), 1), 0.5)
+
+    scores = w_meteo * s_weather + w_prix * s_price + w_hotel * s_review
+
+    # rang par fenêtre (colonne) : 1 = meilleure ville
+    order = np.argsort(-scores, axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(cities) + 1)[:, None], axis=0)
+
+    n_cities, n_windows = scores.shape
+    return pd.DataFrame({
+        "start": np.tile(np.asarray(days, dtype=object)[starts], n_cities),
+        "length": np.tile(lengths, n_cities),
+        "city": np.repeat(cities, n_windows),
+        "temp_mean": temp_mean.ravel(),
+        "rain_sum": rain_sum.ravel(),
+        "score": scores.ravel().round(4),
+        "rank": ranks.ravel(),
+    }).sort_values(["start", "length", "rank"], ignore_index=True)
+
+
+def best_destinations(df_plan, start, length, top=5):
+    """Classement des villes pour un départ et une durée donnés."""
+    mask = (df_plan["start"] == start) & (df_plan["length"] == length)
+    return df_plan[mask].head(top)
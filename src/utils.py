@@ -4,7 +4,7 @@ import boto3
 import pandas as pd
 from pathlib import Path
 import plotly.express as px
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 
 from config import (
     RDS_URI,
@@ -85,12 +85,14 @@ def fetch_weather(df_geo, days=7):
 
         r = requests.get(url, timeout=10).json()
 
+        dates = r["daily"]["time"][:days]
         temps = r["daily"]["temperature_2m_max"][:days]
         rains = r["daily"]["precipitation_sum"][:days]
 
-        for t, rain in zip(temps, rains):
+        for d, t, rain in zip(dates, temps, rains):
             rows.append({
                 "city": city,
+                "date": d,
                 "temp_day": t,
                 "rain": rain,
             })
@@ -150,8 +152,30 @@ def make_maps(df_geo, df_dest, df_hotels):
     # ---------------------------------
     # MAP 2 : TOP 20 HÔTELS
     # ---------------------------------
-    # Désactivation de la carte hôtels (lat/lon indisponibles)
-    return
+    # lat/lon issus de l'enrichissement des pages détail
+    if "lat" not in df_hotels.columns:
+        return
+
+    df_top = (
+        df_hotels.dropna(subset=["lat", "lon", "score_num"])
+        .sort_values("score_num", ascending=False)
+        .head(20)
+    )
+    if df_top.empty:
+        return
+
+    fig2 = px.scatter_mapbox(
+        df_top,
+        lat="lat", lon="lon",
+        color="score_num",
+        hover_name="hotelName",
+        hover_data=["city", "price_eur", "stars", "review_count", "address"],
+        color_continuous_scale="Turbo",
+        zoom=5,
+        height=800
+    )
+    fig2.update_layout(mapbox_style="open-street-map")
+    fig2.write_html(FIG / "top20_hotels_map.html")
 
 # =====================================================================
 # 5) CHARGEMENT JSON (non utilisé dans nouvelle version LIVE)
@@ -181,9 +205,11 @@ def upload_file_to_s3(path: Path, s3_key: str):
         s3.upload_file(str(path), AWS_BUCKET, s3_key)
 
         print(f"☁️ Upload OK → s3://{AWS_BUCKET}/{s3_key}")
+        return True
 
     except Exception as e:
         print(f"[ERR] Upload S3: {e}")
+        return False
 
 
 
@@ -211,3 +237,63 @@ def load_to_rds(df_dest, df_hotels):
         return
 
 
+# =====================================================================
+# 8) RDS INCRÉMENTAL (deltas CDC)
+# =====================================================================
+def apply_deltas_to_rds(deltas):
+    """
+    Applique les deltas CDC : deltas = [(table, df_delta, keys, df_full, full), ...]
+    - table absente, full=True (pas de snapshot précédent) ou colonnes différentes
+      de la table RDS (schéma qui a évolué) → chargement complet de df_full
+    - sinon, dans une transaction : DELETE des clés touchées puis INSERT
+      des lignes insérées / modifiées
+    Retourne True si tout est passé.
+    """
+    try:
+        print("🗄️ Connexion RDS (delta)…")
+
+        engine = create_engine(
+            RDS_URI,
+            pool_pre_ping=True,
+            connect_args={"connect_timeout": 10}
+        )
+
+        with engine.begin() as conn:
+            insp = inspect(conn)
+            existing = set(insp.get_table_names())
+
+            for table, delta, keys, df_full, full in deltas:
+                drift = False
+                if table in existing:
+                    rds_cols = {c["name"] for c in insp.get_columns(table)}
+                    drift = rds_cols != set(df_full.columns)
+
+                if full or drift or table not in existing:
+                    df_full.to_sql(table, conn, if_exists="replace", index=False)
+                    reason = "schéma modifié" if drift else "chargement complet"
+                    print(f"🗄️ {table} : {reason} ({len(df_full)} lignes)")
+                    continue
+
+                if delta.empty:
+                    print(f"🗄️ {table} : aucun changement")
+                    continue
+
+                stage = f"_stage_{table}"
+                delta[keys].to_sql(stage, conn, if_exists="replace", index=False)
+                match = " AND ".join(f'"{table}"."{k}" = s."{k}"' for k in keys)
+                conn.execute(text(
+                    f'DELETE FROM "{table}" WHERE EXISTS (SELECT 1 FROM "{stage}" s WHERE {match})'
+                ))
+                conn.execute(text(f'DROP TABLE "{stage}"'))
+
+                upserts = delta[delta["change_type"] != "deleted"].drop(columns="change_type")
+                upserts.to_sql(table, conn, if_exists="append", index=False)
+                print(f"🗄️ {table} : {len(delta)} lignes delta appliquées")
+
+        print("🗄️ RDS OK")
+        return True
+
+    except Exception as e:
+        print("❌ ERREUR RDS (delta) :")
+        print(e)
+        return False
@@ -0,0 +1,278 @@
+"""
+Warehouse local DuckDB (reports/processed/kayak.duckdb) :
+
+    dim_destination   ville, lat, lon
+    fact_weather      prévision journalière (city, date)
+    dim_hotel         hôtels enrichis + canonical_id / is_primary
+    mart_city_summary vue matérialisée par ville, rafraîchie uniquement
+                      pour les villes dont la météo ou les hôtels ont changé
+
+Requêtes ad hoc :
+    duckdb reports/processed/kayak.duckdb "SELECT * FROM v_destination_ranking LIMIT 5"
+"""
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+
+ROOT = Path(__file__).resolve().parents[1]
+WAREHOUSE_PATH = ROOT / "reports" / "processed" / "kayak.duckdb"
+WEATHER_DAYS = 7
+
+HOTEL_COLUMNS = [
+    "city", "hotel_key", "canonical_id", "is_primary", "hotelName", "score_num",
+    "price_eur", "url", "lat", "lon", "address", "stars", "review_count",
+]
+
+
+# =====================================================================
+# 1) SCHÉMA
+# =====================================================================
+# pas de PRIMARY KEY : DuckDB refuse de réinsérer une clé supprimée dans la
+# même transaction (delete + insert) ; l'unicité est garantie par les upserts
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS dim_destination (
+    city VARCHAR,
+    lat DOUBLE,
+    lon DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS fact_weather (
+    city VARCHAR,
+    date DATE,
+    temp_day DOUBLE,
+    rain DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS dim_hotel (
+    city VARCHAR,
+    hotel_key VARCHAR,
+    canonical_id VARCHAR,
+    is_primary BOOLEAN,
+    hotelName VARCHAR,
+    score_num DOUBLE,
+    price_eur DOUBLE,
+    url VARCHAR,
+    lat DOUBLE,
+    lon DOUBLE,
+    address VARCHAR,
+    stars INTEGER,
+    review_count INTEGER
+);
+
+-- les WEATHER_DAYS derniers jours de prévision par ville
+CREATE OR REPLACE VIEW v_weather_latest AS
+SELECT city, date, temp_day, rain
+FROM (
+    SELECT *, row_number() OVER (PARTITION BY city ORDER BY date DESC) AS rn
+    FROM fact_weather
+)
+WHERE rn <= {WEATHER_DAYS};
+
+-- définition logique du mart (même formule que utils.compute_destination_score)
+CREATE OR REPLACE VIEW v_city_summary AS
+WITH w AS (
+    SELECT city, avg(temp_day) AS temp_mean, sum(rain) AS rain_sum, count(*) AS n_days
+    FROM v_weather_latest GROUP BY city
+),
+h AS (
+    SELECT city,
+           avg(price_eur) AS price_mean,
+           avg(score_num) AS score_mean,
+           count(*) AS n_hotels
+    FROM dim_hotel WHERE is_primary GROUP BY city
+),
+s AS (
+    SELECT d.city, d.lat, d.lon, w.temp_mean, w.rain_sum, w.n_days,
+           h.price_mean, h.score_mean, coalesce(h.n_hotels, 0) AS n_hotels,
+           0.7 * greatest(0, least(1, (w.temp_mean - 5) / 25))
+             + 0.3 * (1 - least(w.rain_sum / 50, 1)) AS score_weather,
+           CASE WHEN h.price_mean IS NULL THEN 0.5
+                ELSE greatest(0, least(1, 1 - (h.price_mean - 50) / 150)) END AS score_price
+    FROM dim_destination d
+    JOIN w USING (city)
+    LEFT JOIN h USING (city)
+)
+SELECT city, lat, lon, temp_mean, rain_sum, n_days, price_mean, score_mean, n_hotels,
+       round(coalesce(0.6 * score_weather + 0.4 * score_price, 0), 4) AS destination_score
+FROM s;
+
+CREATE TABLE IF NOT EXISTS mart_city_summary AS
+SELECT *, now() AS refreshed_at FROM v_city_summary WHERE false;
+
+CREATE OR REPLACE VIEW v_destination_ranking AS
+SELECT rank() OVER (ORDER BY destination_score DESC) AS rank, *
+FROM mart_city_summary;
+"""
+
+
+def connect(read_only=False, path=WAREHOUSE_PATH):
+    con = duckdb.connect(str(path), read_only=read_only)
+    if not read_only:
+        con.execute(SCHEMA)
+    return con
+
+
+# =====================================================================
+# 2) CHARGEMENT INCRÉMENTAL (retourne les villes modifiées)
+# =====================================================================
+def _with_dates(df_weather):
+    """Anciens weather_raw sans date : jours consécutifs à partir d'aujourd'hui."""
+    df = df_weather.copy()
+    if "date" not in df.columns:
+        offset = df.groupby("city").cumcount()
+        df["date"] = [date.today() + timedelta(days=int(i)) for i in offset]
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    return df[["city", "date", "temp_day", "rain"]]
+
+
+# Toutes les fonctions ci-dessous travaillent sur la table `run_scope`
+# (villes du run, enregistrée par load_warehouse) : une ville du périmètre
+# absente des données du run est vidée, pas conservée telle quelle.
+
+def drop_removed_cities(con):
+    """Villes sorties du périmètre (retirées de CITIES) : supprimées partout."""
+    removed = con.execute("""
+        SELECT city FROM dim_destination
+        UNION SELECT city FROM mart_city_summary
+        EXCEPT SELECT city FROM run_scope
+    """).df()["city"].tolist()
+    for table in ["dim_destination", "fact_weather", "dim_hotel"]:
+        con.execute(f"DELETE FROM {table} WHERE city NOT IN (SELECT city FROM run_scope)")
+    return set(removed)
+
+
+def upsert_destinations(con, df_geo):
+    df = df_geo[["city", "lat", "lon"]].drop_duplicates("city")
+    con.register("new_geo", df)
+    changed = con.execute("""
+        SELECT DISTINCT city FROM (
+            (SELECT city, lat, lon FROM new_geo WHERE city IN (SELECT city FROM run_scope)
+             EXCEPT SELECT city, lat, lon FROM dim_destination)
+            UNION ALL
+            (SELECT city, lat, lon FROM dim_destination WHERE city IN (SELECT city FROM run_scope)
+             EXCEPT SELECT city, lat, lon FROM new_geo)
+        )
+    """).df()["city"].tolist()
+    con.execute("DELETE FROM dim_destination WHERE city IN (SELECT city FROM run_scope)")
+    con.execute("""
+        INSERT INTO dim_destination
+        SELECT city, lat, lon FROM new_geo WHERE city IN (SELECT city FROM run_scope)
+    """)
+    con.unregister("new_geo")
+    return set(changed)
+
+
+def upsert_weather(con, df_weather):
+    con.register("new_weather", _with_dates(df_weather))
+    changed = con.execute("""
+        SELECT DISTINCT n.city
+        FROM new_weather n
+        LEFT JOIN fact_weather f ON f.city = n.city AND f.date = n.date
+        WHERE f.city IS NULL
+           OR f.temp_day IS DISTINCT FROM n.temp_day
+           OR f.rain IS DISTINCT FROM n.rain
+    """).df()["city"].tolist()
+    con.execute("""
+        DELETE FROM fact_weather f USING new_weather n
+        WHERE f.city = n.city AND f.date = n.date
+    """)
+    con.execute("INSERT INTO fact_weather SELECT city, date, temp_day, rain FROM new_weather")
+    con.unregister("new_weather")
+    return set(changed)
+
+
+def replace_hotels(con, df_hotels):
+    """
+    Hôtels remplacés pour toutes les villes du périmètre (une ville sans résultat
+    ce run est vidée) ; seules les villes dont le contenu diffère sont signalées.
+    """
+    df = df_hotels.copy()
+    for c in HOTEL_COLUMNS:
+        if c not in df.columns:
+            df[c] = None
+    for c in ["stars", "review_count"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+    con.register("new_hotels", df[HOTEL_COLUMNS])
+
+    compare = "city, hotel_key, is_primary, score_num, price_eur"
+    changed = con.execute(f"""
+        SELECT DISTINCT city FROM (
+            (SELECT {compare} FROM new_hotels WHERE city IN (SELECT city FROM run_scope)
+             EXCEPT SELECT {compare} FROM dim_hotel WHERE city IN (SELECT city FROM run_scope))
+            UNION ALL
+            (SELECT {compare} FROM dim_hotel WHERE city IN (SELECT city FROM run_scope)
+             EXCEPT SELECT {compare} FROM new_hotels)
+        )
+    """).df()["city"].tolist()
+
+    con.execute("DELETE FROM dim_hotel WHERE city IN (SELECT city FROM run_scope)")
+    con.execute(f"""
+        INSERT INTO dim_hotel SELECT {', '.join(HOTEL_COLUMNS)}
+        FROM new_hotels WHERE city IN (SELECT city FROM run_scope)
+    """)
+    con.unregister("new_hotels")
+    return set(changed)
+
+
+# =====================================================================
+# 3) RAFRAÎCHISSEMENT DU MART
+# =====================================================================
+def refresh_mart(con, cities=None):
+    """Recalcule mart_city_summary pour `cities` (None = tout)."""
+    if cities is None:
+        con.execute("DELETE FROM mart_city_summary")
+        con.execute("INSERT INTO mart_city_summary SELECT *, now() FROM v_city_summary")
+        return con.execute("SELECT count(*) FROM mart_city_summary").fetchone()[0]
+
+    if not cities:
+        return 0
+    con.register("dirty", pd.DataFrame({"city": sorted(cities)}))
+    con.execute("DELETE FROM mart_city_summary WHERE city IN (SELECT city FROM dirty)")
+    con.execute("""
+        INSERT INTO mart_city_summary
+        SELECT *, now() FROM v_city_summary WHERE city IN (SELECT city FROM dirty)
+    """)
+    con.unregister("dirty")
+    return len(cities)
+
+
+def load_warehouse(df_geo, df_weather, df_hotels, cities=None, path=WAREHOUSE_PATH):
+    """
+    Charge les tables du run puis rafraîchit le mart pour les villes modifiées.
+    cities = périmètre du run (défaut : villes de df_geo) ; les villes hors
+    périmètre sont supprimées et retirées du mart.
+    """
+    scope = pd.DataFrame({"city": sorted(set(cities if cities is not None else df_geo["city"]))})
+    con = connect(path=path)
+    try:
+        con.execute("BEGIN TRANSACTION")
+        con.register("run_scope", scope)
+        first_load = con.execute("SELECT count(*) FROM mart_city_summary").fetchone()[0] == 0
+
+        dirty = drop_removed_cities(con)
+        dirty |= upsert_destinations(con, df_geo)
+        dirty |= upsert_weather(con, df_weather)
+        dirty |= replace_hotels(con, df_hotels)
+
+        n = refresh_mart(con, None if first_load else dirty)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+    return n
+
+
+# =====================================================================
+# 4) LECTURE (dashboard / analyses)
+# =====================================================================
+def query(sql, params=None, path=WAREHOUSE_PATH):
+    con = connect(read_only=True, path=path)
+    try:
+        return con.execute(sql, params or []).df()
+    finally:
+        con.close()